@@ -0,0 +1,110 @@
+import argparse
+import json
+import os
+
+from curses_tools import Sprite
+
+BUNDLE_VERSION = 1
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+FRAMES_DIR = 'frames'
+BUNDLE_PATH = os.path.join(PACKAGE_DIR, 'frames.bundle')
+
+
+class AssetBundle:
+    """Все кадры из frames/ одним файлом: текст, размеры и отрезки для отрисовки.
+
+    Пакет читается целиком за одно чтение при первом обращении к кадру, а
+    спрайт собирается из готовых отрезков, без разбора текста. Ключ кадра —
+    путь относительно каталога игры, например 'frames/duck.txt', поэтому
+    игру можно запускать из любого каталога.
+
+    Как и __pycache__, пакет пересобирается сам: если файла нет, он другой
+    версии или кадры на диске изменились, кадры читаются из frames/ и пакет
+    записывается заново (если каталог доступен на запись).
+    """
+
+    def __init__(self, path=BUNDLE_PATH, package_dir=PACKAGE_DIR):
+        self.path = path
+        self.package_dir = package_dir
+        self._entries = None
+        self._sprites = {}
+
+    def sprite(self, name):
+        """Спрайт кадра по пути относительно каталога игры."""
+        sprite = self._sprites.get(name)
+        if sprite is None:
+            if self._entries is None:
+                self._entries = self._load()
+            text, rows, columns, runs = self._entries[name]
+            sprite = self._sprites[name] = Sprite.from_runs(text, rows, columns, runs)
+        return sprite
+
+    def names(self):
+        if self._entries is None:
+            self._entries = self._load()
+        return sorted(self._entries)
+
+    def _sources(self):
+        """Размер и время изменения каждого кадра — по ним видно, что пакет устарел."""
+        frames_dir = os.path.join(self.package_dir, FRAMES_DIR)
+        sources = {}
+        for filename in sorted(os.listdir(frames_dir)):
+            if not filename.endswith('.txt'):
+                continue
+            stat = os.stat(os.path.join(frames_dir, filename))
+            sources[f'{FRAMES_DIR}/{filename}'] = [stat.st_size, stat.st_mtime_ns]
+        return sources
+
+    def _load(self):
+        sources = self._sources()
+        try:
+            with open(self.path, 'r', encoding='utf-8') as fh:
+                bundle = json.load(fh)
+        except (OSError, ValueError):
+            bundle = None
+
+        if bundle is None or bundle.get('version') != BUNDLE_VERSION or bundle.get('sources') != sources:
+            bundle = self.build(sources)
+        return bundle['frames']
+
+    def build(self, sources=None):
+        """Собрать пакет из frames/ и попробовать сохранить его рядом с игрой."""
+        if sources is None:
+            sources = self._sources()
+        frames = {}
+        for name in sources:
+            with open(os.path.join(self.package_dir, name), 'r', encoding='utf-8') as fh:
+                sprite = Sprite(fh.read())
+            frames[name] = [sprite.text, sprite.rows, sprite.columns, sprite.runs]
+
+        bundle = {'version': BUNDLE_VERSION, 'sources': sources, 'frames': frames}
+        try:
+            # Через временный файл, чтобы параллельный запуск не прочитал пакет наполовину
+            temporary_path = f'{self.path}.{os.getpid()}.tmp'
+            with open(temporary_path, 'w', encoding='utf-8') as fh:
+                json.dump(bundle, fh, ensure_ascii=False, separators=(',', ':'))
+            os.replace(temporary_path, self.path)
+        except OSError:
+            pass
+        return bundle
+
+
+assets = AssetBundle()
+
+
+def load_sprite(name):
+    """Спрайт кадра из общего пакета, например load_sprite('frames/duck.txt')."""
+    return assets.sprite(name)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Собрать пакет кадров из frames/.')
+    parser.add_argument('--output', default=BUNDLE_PATH, help='куда записать пакет')
+    args = parser.parse_args()
+
+    bundle = AssetBundle(args.output).build()
+    print(f'{len(bundle["frames"])} frames -> {args.output}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+import time
+
+from curses_tools import DOWN_KEY_CODE, LEFT_KEY_CODE, RIGHT_KEY_CODE, SPACE_KEY_CODE, UP_KEY_CODE
+from scheduler import clock
+
+# Ходы автопилота: (направление по строкам, по колонкам) — стоять и четыре стрелки
+MOVES = ((0, 0), (-1, 0), (1, 0), (0, -1), (0, 1))
+MOVE_KEY_CODES = {
+    (0, 0): [],
+    (-1, 0): [UP_KEY_CODE],
+    (1, 0): [DOWN_KEY_CODE],
+    (0, -1): [LEFT_KEY_CODE],
+    (0, 1): [RIGHT_KEY_CODE],
+}
+
+# Сколько ходов подряд перебирать и сколько тиков держать каждый: 5 ** 3 = 125 вариантов будущего на 12 тиков
+SEARCH_DEPTH = 3
+HOLD_TICKS = 4
+
+# Вес выживания в оценке: лишний прожитый тик важнее любого зазора до мусора
+SURVIVAL_WEIGHT = 1000
+HIT_WEIGHT = 10
+
+
+class Autopilot:
+    """Автопилот с перебором на несколько ходов вперёд по копии мира.
+
+    Раз в тик capture() переносит состояние игры в world (world.World),
+    и автопилот перебирает в глубину все цепочки из depth ходов MOVES,
+    каждый из которых держится hold тиков, возвращая мир снимком после
+    каждой ветки. Лучшая цепочка — та, где корабль дольше цел, затем
+    больше сбитого мусора и больше зазор до мусора над кораблём; из неё
+    выполняется только первый ход, на следующем тике перебор повторяется.
+    Стреляет автопилот всегда: до FIRE_UNLOCK_YEAR пробел игра не замечает.
+
+    budget ограничивает перебор по времени, в секундах: когда он исчерпан,
+    оставшиеся ветки не смотрятся, и берётся лучший из найденных ходов.
+    Без budget перебор полный, и выбор хода не зависит от скорости машины —
+    так нужно для прогонов в виртуальном времени.
+
+    Повторяет интерфейс controls.Controls: read() отдаёт
+    (rows_direction, columns_direction, space_pressed), а выбранные
+    клавиши, как и Controls, пишет в history для записи сессии.
+    """
+
+    def __init__(self, world, capture, depth=SEARCH_DEPTH, hold=HOLD_TICKS, budget=None):
+        self.world = world
+        self.capture = capture
+        self.depth = depth
+        self.hold = hold
+        self.budget = budget
+        self._deadline = None
+        self.history = None
+        # Сколько вариантов будущего перебрано на последнем тике и за сколько секунд
+        self.futures = 0
+        self.search_time = 0.0
+        self.latency = 0.0
+
+    def read(self):
+        started_at = time.perf_counter()
+        self._deadline = started_at + self.budget if self.budget is not None else None
+        self.capture()
+        self.futures = 0
+        _, move = self._search(self.depth)
+        self.search_time = time.perf_counter() - started_at
+
+        if self.history is not None:
+            self.history[clock.tick] = MOVE_KEY_CODES[move] + [SPACE_KEY_CODE]
+        return move[0], move[1], True
+
+    def _search(self, depth):
+        """Лучшая оценка и первый ход среди всех цепочек из depth ходов от текущего состояния мира."""
+        world = self.world
+        if depth == 0 or world.crashed:
+            self.futures += 1
+            return (world.tick * SURVIVAL_WEIGHT + world.hits * HIT_WEIGHT + world.clearance()), None
+
+        best_score, best_move = None, MOVES[0]
+        snapshot = world.snapshot()
+        for move in MOVES:
+            for _ in range(self.hold):
+                world.step(move[0], move[1], True)
+            score, _ = self._search(depth - 1)
+            world.restore(snapshot)
+            if best_score is None or score > best_score:
+                best_score, best_move = score, move
+            if self._deadline is not None and time.perf_counter() > self._deadline:
+                break
+        return best_score, best_move
@@ -0,0 +1,128 @@
+import curses
+import os
+import sys
+
+
+class CursesBackend:
+    """Вывод кадра через окно curses: addstr на каждый отрезок и один refresh.
+
+    Подходит для любого объекта с API окна, в том числе HeadlessCanvas.
+    """
+
+    name = 'curses'
+    # Пишет через окно curses: из потока вывода — только под его lock
+    uses_window = True
+
+    def __init__(self, window):
+        self.window = window
+        # Сколько байт ушло на терминал, curses не сообщает
+        self.bytes_total = None
+
+    def border(self):
+        self.window.border()
+
+    def draw(self, row, column, text, attr):
+        try:
+            self.window.addstr(row, column, text, attr)
+        except curses.error:
+            # Запись в правый нижний угол окна curses считает ошибкой
+            pass
+
+    def flush(self):
+        self.window.refresh()
+
+
+class AnsiBackend:
+    """Вывод кадра escape-последовательностями ANSI напрямую в терминал.
+
+    Отрезки кадра превращаются в перемещения курсора и атрибуты SGR в одном
+    буфере байт, который уходит на терминал одним os.write за кадр.
+    Перемещение пропускается, если курсор уже стоит где надо, а атрибуты —
+    если они не изменились. curses при этом по-прежнему отвечает за режим
+    терминала и ввод, но сам на экран больше ничего не пишет.
+    """
+
+    name = 'ansi'
+    uses_window = False
+
+    # Биты атрибутов curses и соответствующие им параметры SGR
+    SGR_CODES = (
+        (curses.A_BOLD, '1'),
+        (curses.A_DIM, '2'),
+        (curses.A_UNDERLINE, '4'),
+        (curses.A_BLINK, '5'),
+        (curses.A_REVERSE, '7'),
+    )
+    BORDER_CHARS = {'horizontal': '─', 'vertical': '│', 'corners': '┌┐└┘'}
+
+    def __init__(self, window, fd=None):
+        self.window = window
+        self.fd = fd if fd is not None else sys.stdout.fileno()
+        self.rows, self.columns = window.getmaxyx()
+        self.bytes_total = 0
+        self._chunks = []
+        self._sgr_cache = {}
+        self._attr = None
+        self._cursor = None
+        # Один refresh, чтобы curses очистил экран и включил полноэкранный режим до первого кадра
+        window.refresh()
+
+    def border(self):
+        last_row, last_column = self.rows - 1, self.columns - 1
+        horizontal = self.BORDER_CHARS['horizontal'] * (last_column - 1)
+        vertical = self.BORDER_CHARS['vertical']
+        top_left, top_right, bottom_left, bottom_right = self.BORDER_CHARS['corners']
+        self.draw(0, 0, top_left + horizontal + top_right, 0)
+        for row in range(1, last_row):
+            self.draw(row, 0, vertical, 0)
+            self.draw(row, last_column, vertical, 0)
+        self.draw(last_row, 0, bottom_left + horizontal + bottom_right, 0)
+
+    def draw(self, row, column, text, attr):
+        chunks = self._chunks
+        cursor = self._cursor
+        if cursor is None or cursor[0] != row or cursor[1] > column:
+            chunks.append(f'\x1b[{row + 1};{column + 1}H')
+        elif cursor[1] < column:
+            # Вперёд по той же строке короче сдвинуть курсор, чем ставить его заново
+            chunks.append(f'\x1b[{column - cursor[1]}C')
+        if self._attr != attr:
+            chunks.append(self._sgr(attr))
+            self._attr = attr
+        chunks.append(text)
+        self._cursor = (row, column + len(text))
+
+    def flush(self):
+        if not self._chunks:
+            return
+        data = ''.join(self._chunks).encode('utf-8')
+        self._chunks.clear()
+        view = memoryview(data)
+        while view:
+            written = os.write(self.fd, view)
+            view = view[written:]
+        self.bytes_total += len(data)
+        # Кто-то другой (например, curses при выходе) мог сдвинуть курсор: кадр начинаем с явного перемещения
+        self._cursor = None
+
+    def _sgr(self, attr):
+        sequence = self._sgr_cache.get(attr)
+        if sequence is None:
+            codes = ['0'] + [code for bit, code in self.SGR_CODES if attr & bit]
+            sequence = self._sgr_cache[attr] = f'\x1b[{";".join(codes)}m'
+        return sequence
+
+
+BACKENDS = {
+    CursesBackend.name: CursesBackend,
+    AnsiBackend.name: AnsiBackend,
+}
+
+
+def make_backend(name, window):
+    """Создать бэкенд вывода по имени из BACKENDS."""
+    try:
+        backend_class = BACKENDS[name]
+    except KeyError:
+        raise ValueError(f'unknown render backend {name!r}, expected one of: {", ".join(BACKENDS)}') from None
+    return backend_class(window)
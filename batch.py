@@ -0,0 +1,247 @@
+import argparse
+import asyncio
+import collections
+import concurrent.futures
+import itertools
+import json
+import os
+import random
+import signal
+import statistics
+import sys
+import time
+
+from curses_tools import KEY_ACTIONS, SPACE_KEY_CODE
+from game_scenario import Scenario, scenario as default_scenario
+from headless import DEFAULT_COLUMNS, DEFAULT_ROWS, HeadlessCanvas
+from scheduler import clock
+
+DEFAULT_YEARS = 80
+DEFAULT_RUNS = 8
+# Сколько секунд даётся одной игре, прежде чем её прервут
+DEFAULT_TIMEOUT = 120
+
+# Случайный пилот: вероятность нажать стрелку и пробел на тике
+RANDOM_MOVE_CHANCE = 0.3
+RANDOM_FIRE_CHANCE = 0.2
+MOVE_KEY_CODES = sorted(code for code, action in KEY_ACTIONS.items() if not action[2])
+
+Job = collections.namedtuple('Job', 'seed pilot delay_scale speed_range fire_speed years rows columns')
+
+
+class RunTimeout(Exception):
+    """Игра не уложилась в отведённое время."""
+
+
+def idle_keys(seed, ticks):
+    """Пилот без рук: корабль висит на месте."""
+    return {}
+
+
+def random_keys(seed, ticks):
+    """Случайный пилот: дёргается по стрелкам и стреляет, каждый тик независимо."""
+    rng = random.Random(seed)
+    keys = {}
+    for tick in range(ticks):
+        codes = []
+        if rng.random() < RANDOM_MOVE_CHANCE:
+            codes.append(rng.choice(MOVE_KEY_CODES))
+        if rng.random() < RANDOM_FIRE_CHANCE:
+            codes.append(SPACE_KEY_CODE)
+        if codes:
+            keys[tick] = codes
+    return keys
+
+
+# Пилот — имя из PILOTS, AUTOPILOT или путь к записи main.py --record, нажатия из которой проигрываются
+PILOTS = {
+    'idle': idle_keys,
+    'random': random_keys,
+}
+# Пилот, который не нажимает клавиши, а управляет кораблём сам (autopilot.Autopilot)
+AUTOPILOT = 'autopilot'
+
+
+def pilot_keys(pilot, seed, ticks):
+    if pilot == AUTOPILOT:
+        return {}
+    if pilot in PILOTS:
+        return PILOTS[pilot](seed, ticks)
+    from replay import load_recording
+
+    return {tick: codes for tick, codes in load_recording(pilot)['input']}
+
+
+def job_scenario(job):
+    """Сценарий по умолчанию с параметрами баланса задания."""
+    delays = [(year, max(1, round(delay * job.delay_scale))) for year, delay in default_scenario.garbage_delays]
+    return Scenario(
+        default_scenario.phrases,
+        delays,
+        default_scenario.phrase_years,
+        garbage_speed_range=job.speed_range,
+        fire_speed=job.fire_speed,
+    )
+
+
+def run_job(job, timeout=None):
+    """Сыграть одну игру без терминала и вернуть её итог словарём; выполняется в процессе пула."""
+    import main as game
+
+    ticks = job.years * game.YEAR_TICS
+    canvas = HeadlessCanvas(job.rows, job.columns, pilot_keys(job.pilot, job.seed, ticks))
+    peak = [0]
+    costs = []
+
+    def on_tick(tick):
+        costs.append(time.perf_counter() - clock.tick_started_at)
+        debris = len(game.obstacles)
+        if debris > peak[0]:
+            peak[0] = debris
+
+    def on_alarm(signum, frame):
+        raise RunTimeout()
+
+    result = job._asdict()
+    # Таймер процесса прерывает зависшую игру, и воркер берёт следующее задание
+    use_alarm = timeout and hasattr(signal, 'setitimer')
+    if use_alarm:
+        previous = signal.signal(signal.SIGALRM, on_alarm)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    clock.listeners.append(on_tick)
+    started_at = time.process_time()
+    try:
+        asyncio.run(game.draw(canvas, years=job.years, virtual_time=True, seed=job.seed,
+                              scenario=job_scenario(job), until_crash=True, autopilot=job.pilot == AUTOPILOT))
+        result['status'] = 'crashed' if game.crash_tick is not None else 'survived'
+    except RunTimeout:
+        result['status'] = 'timeout'
+    finally:
+        if use_alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, previous)
+        clock.listeners.remove(on_tick)
+
+    result.update({
+        'ticks': clock.tick,
+        'survival_year': game.year_at(clock.tick),
+        'peak_debris': peak[0],
+        'cpu_s': round(time.process_time() - started_at, 3),
+        'tick_median_us': round(statistics.median(costs) * 1e6, 1) if costs else None,
+        'tick_max_us': round(max(costs) * 1e6, 1) if costs else None,
+    })
+    return result
+
+
+def make_jobs(runs, seed, pilots, delay_scales, speed_ranges, fire_speeds, years, rows, columns):
+    """Задания перебора: каждая комбинация параметров с runs сидами подряд от seed."""
+    return [
+        Job(seed + run, pilot, delay_scale, speed_range, fire_speed, years, rows, columns)
+        for pilot, delay_scale, speed_range, fire_speed in itertools.product(
+            pilots, delay_scales, speed_ranges, fire_speeds,
+        )
+        for run in range(runs)
+    ]
+
+
+def run_batch(jobs, workers=None, timeout=DEFAULT_TIMEOUT):
+    """Сыграть задания в пуле процессов и отдавать итоги по мере готовности, а не в порядке заданий."""
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(run_job, job, timeout): job for job in jobs}
+        for future in concurrent.futures.as_completed(futures):
+            try:
+                yield future.result()
+            except Exception as error:
+                # Упавшая игра — тоже итог: перебор продолжается
+                result = futures[future]._asdict()
+                result.update(status='error', error=repr(error))
+                yield result
+
+
+def summarize(results):
+    """Свести итоги по комбинациям параметров: годы выживания, пик мусора, стоимость тика."""
+    groups = collections.defaultdict(list)
+    for result in results:
+        key = (result['pilot'], result['delay_scale'], tuple(result['speed_range']), result['fire_speed'])
+        groups[key].append(result)
+
+    summary = []
+    for (pilot, delay_scale, speed_range, fire_speed), group in sorted(groups.items()):
+        played = [result for result in group if result['status'] in ('crashed', 'survived')]
+        years = sorted(result['survival_year'] for result in played if result['status'] == 'crashed')
+        costs = [result['tick_median_us'] for result in played if result['tick_median_us'] is not None]
+        summary.append({
+            'pilot': pilot,
+            'delay_scale': delay_scale,
+            'speed_range': list(speed_range),
+            'fire_speed': fire_speed,
+            'runs': len(group),
+            'survived': sum(result['status'] == 'survived' for result in group),
+            'failed': len(group) - len(played),
+            # Распределение года гибели по тем, кто разбился
+            'crash_years': {
+                'min': years[0], 'median': statistics.median(years), 'max': years[-1],
+            } if years else None,
+            'crash_year_counts': dict(collections.Counter(years)),
+            'peak_debris': max((result['peak_debris'] for result in played), default=None),
+            'tick_median_us': round(statistics.median(costs), 1) if costs else None,
+        })
+    return summary
+
+
+def _speed_range(text):
+    low, _, high = text.partition(':')
+    return float(low), float(high)
+
+
+def main():
+    import main as game
+
+    parser = argparse.ArgumentParser(description='Сыграть много игр без терминала параллельно для подбора баланса.')
+    parser.add_argument('--runs', type=int, default=DEFAULT_RUNS, help='сколько сидов на комбинацию параметров')
+    parser.add_argument('--seed', type=int, default=0, help='первый сид')
+    parser.add_argument('--years', type=int, default=DEFAULT_YEARS, help='сколько игровых лет длится игра без аварии')
+    parser.add_argument('--rows', type=int, default=DEFAULT_ROWS)
+    parser.add_argument('--columns', type=int, default=DEFAULT_COLUMNS)
+    parser.add_argument(
+        '--pilot', nargs='+', default=['random'],
+        help=f'пилоты: {", ".join([*PILOTS, AUTOPILOT])} или файл записи main.py --record',
+    )
+    parser.add_argument(
+        '--delay-scale', type=float, nargs='+', default=[1.0], help='множители пауз между запусками мусора',
+    )
+    parser.add_argument(
+        '--speed-range', type=_speed_range, nargs='+', default=[game.GARBAGE_SPEED_RANGE], metavar='LOW:HIGH',
+        help='диапазоны скорости мусора',
+    )
+    parser.add_argument('--fire-speed', type=float, nargs='+', default=[game.FIRE_SPEED], help='скорости снаряда')
+    parser.add_argument('--workers', type=int, help=f'сколько процессов (по умолчанию {os.cpu_count()})')
+    parser.add_argument('--timeout', type=float, default=DEFAULT_TIMEOUT, help='секунд на одну игру')
+    parser.add_argument('--output', help='записывать итоги игр в файл JSON lines по мере готовности')
+    args = parser.parse_args()
+
+    jobs = make_jobs(
+        args.runs, args.seed, args.pilot, args.delay_scale, args.speed_range, args.fire_speed,
+        args.years, args.rows, args.columns,
+    )
+    output = open(args.output, 'w', encoding='utf-8') if args.output else None
+    results = []
+    started_at = time.perf_counter()
+    try:
+        for result in run_batch(jobs, args.workers, args.timeout):
+            results.append(result)
+            line = json.dumps(result)
+            print(f'[{len(results)}/{len(jobs)}] {line}', file=sys.stderr)
+            if output is not None:
+                output.write(line + '\n')
+                output.flush()
+    finally:
+        if output is not None:
+            output.close()
+
+    print(json.dumps(summarize(results), indent=2))
+    print(f'{len(results)} games in {time.perf_counter() - started_at:.1f} s', file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,395 @@
+import argparse
+from array import array
+import asyncio
+import fcntl
+import glob
+import json
+import os
+import platform
+import random
+import select
+import statistics
+import struct
+import subprocess
+import sys
+import tempfile
+import termios
+import time
+
+import main as game
+from assets import PACKAGE_DIR, AssetBundle, load_sprite
+from backends import BACKENDS
+from curses_tools import Sprite, draw_sprite, get_frame_size
+from game_scenario import Scenario, scenario as default_scenario
+from headless import HeadlessCanvas
+from obstacles import Obstacle, ObstacleRegistry
+from physics import AccelerationTable, numpy, update_speed, update_speeds
+from scheduler import clock
+
+RESULTS_VERSION = 1
+SEED = 1957
+MICRO_BATCHES = 50
+MICRO_BATCH_SIZE = 200
+LOOP_YEARS = 20
+STARTUP_RUNS = 20
+RENDER_YEARS = 5
+RENDER_RUNS = 3
+
+OBSTACLE_COUNTS = (10, 100, 1000)
+BATCH_BODIES = 1000
+STARS_COUNTS = (100, 1000)
+GARBAGE_DELAYS = (None, 2, 1)  # None — штатный сценарий из game_scenario
+TERMINAL_SIZES = ((40, 120), (60, 240))
+RENDER_SIZES = ((60, 240), (100, 400))
+
+# Насколько медиана может вырасти относительно базового прогона, прежде чем считаться регрессией
+REGRESSION_THRESHOLD = 0.10
+
+
+def _percentile(values, fraction):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, round(fraction * (len(ordered) - 1)))
+    return ordered[index]
+
+
+def _summary(samples, **extra):
+    """Медиана и p99 в микросекундах плюс дополнительные поля сценария."""
+    result = {
+        'median_us': statistics.median(samples) * 1e6,
+        'p99_us': _percentile(samples, 0.99) * 1e6,
+        'samples': len(samples),
+    }
+    result.update(extra)
+    return result
+
+
+def _measure(operation, batch_size=MICRO_BATCH_SIZE, batches=MICRO_BATCHES):
+    """Время одной операции по каждой из пачек вызовов."""
+    samples = []
+    for _ in range(batches):
+        started_at = time.perf_counter()
+        for _ in range(batch_size):
+            operation()
+        samples.append((time.perf_counter() - started_at) / batch_size)
+    return samples
+
+
+def bench_draw_frame():
+    results = {}
+    canvas = HeadlessCanvas()
+    for path in sorted(glob.glob(os.path.join(PACKAGE_DIR, 'frames', '*.txt'))):
+        with open(path, 'r', encoding='utf-8') as fh:
+            sprite = Sprite(fh.read())
+
+        def draw_and_erase():
+            draw_sprite(canvas, 5, 5, sprite)
+            draw_sprite(canvas, 5, 5, sprite, negative=True)
+
+        calls_before = sum(canvas.calls.values())
+        samples = _measure(draw_and_erase)
+        calls = (sum(canvas.calls.values()) - calls_before) / (MICRO_BATCHES * MICRO_BATCH_SIZE)
+        results[f'draw_frame/{os.path.basename(path)}'] = _summary(samples, curses_calls_per_op=calls)
+    return results
+
+
+def bench_get_frame_size():
+    text = load_sprite(game.GARBAGE_FILES[-1]).text
+    return {'get_frame_size': _summary(_measure(lambda: get_frame_size(text)))}
+
+
+def bench_update_speed():
+    state = [0.0, 0.0]
+    directions = [(-1, 0), (1, 1), (0, -1), (0, 0)]
+
+    def step():
+        rows_direction, columns_direction = directions[int(state[0] * 10) % len(directions)]
+        state[0], state[1] = update_speed(state[0], state[1], rows_direction, columns_direction)
+
+    results = {'physics.update_speed': _summary(_measure(step))}
+
+    rng = random.Random(SEED)
+    directions = [rng.choice((-1, 0, 1)) for _ in range(BATCH_BODIES * 2)]
+    rows_directions, columns_directions = directions[:BATCH_BODIES], directions[BATCH_BODIES:]
+    variants = {'python': (False, None), 'python+table': (False, AccelerationTable())}
+    if numpy is not None:
+        variants['numpy'] = (True, None)
+        variants['numpy+table'] = (True, AccelerationTable())
+
+    for name, (use_numpy, table) in variants.items():
+        if use_numpy:
+            row_speeds, column_speeds = numpy.zeros(BATCH_BODIES), numpy.zeros(BATCH_BODIES)
+            rows_directions, columns_directions = numpy.array(rows_directions), numpy.array(columns_directions)
+        else:
+            row_speeds, column_speeds = array('d', [0.0] * BATCH_BODIES), array('d', [0.0] * BATCH_BODIES)
+        samples = _measure(
+            lambda: update_speeds(row_speeds, column_speeds, rows_directions, columns_directions, table=table),
+            batch_size=10,
+        )
+        # Время на одно тело, чтобы сравнивать с update_speed напрямую
+        samples = [sample / BATCH_BODIES for sample in samples]
+        results[f'physics.update_speeds/{name}/{BATCH_BODIES}'] = _summary(samples)
+    return results
+
+
+def bench_collisions():
+    results = {}
+    rows, columns = TERMINAL_SIZES[0]
+    for count in OBSTACLE_COUNTS:
+        rng = random.Random(SEED)
+        registry = ObstacleRegistry()
+        for _ in range(count):
+            registry.add(Obstacle(rng.uniform(0, rows), rng.randint(0, columns), rng.randint(2, 9), rng.randint(4, 22)))
+        points = [(rng.randint(0, rows), rng.randint(0, columns)) for _ in range(MICRO_BATCH_SIZE)]
+        cursor = iter(range(10 ** 9))
+
+        def fire_query():
+            row, column = points[next(cursor) % len(points)]
+            registry.oldest_collision(row, column)
+
+        def ship_query():
+            row, column = points[next(cursor) % len(points)]
+            registry.find_collision(row, column, 9, 5)
+
+        results[f'collisions/fire/{count}'] = _summary(_measure(fire_query))
+        results[f'collisions/ship/{count}'] = _summary(_measure(ship_query))
+    return results
+
+
+def bench_startup():
+    """Холодный старт: загрузка всех кадров из пакета и из текстов, плюс запуск процесса."""
+    names = AssetBundle().names()
+
+    def load_bundle():
+        bundle = AssetBundle()
+        for name in names:
+            bundle.sprite(name)
+
+    def load_texts():
+        for name in names:
+            with open(os.path.join(PACKAGE_DIR, name), 'r', encoding='utf-8') as fh:
+                Sprite(fh.read())
+
+    results = {
+        'startup/assets/bundle': _summary(_measure(load_bundle, batch_size=10)),
+        'startup/assets/text': _summary(_measure(load_texts, batch_size=10)),
+    }
+
+    # Импорт игры и загрузка кадров в новом процессе, запущенном не из каталога игры
+    code = (
+        f'import sys; sys.path.insert(0, {PACKAGE_DIR!r}); import main; '
+        'main.load_rocket_frames(); main.load_garbage_frames(); main.load_sprite(main.GAME_OVER_FILE)'
+    )
+    samples = []
+    for _ in range(STARTUP_RUNS):
+        started_at = time.perf_counter()
+        subprocess.run([sys.executable, '-c', code], cwd=tempfile.gettempdir(), check=True)
+        samples.append(time.perf_counter() - started_at)
+    results['startup/process'] = _summary(samples)
+    return results
+
+
+# Игра на настоящем терминале (псевдотерминале) в виртуальном времени: кадр на каждый тик
+RENDER_CHILD = '''
+import asyncio, curses, json, locale, sys, time
+sys.path.insert(0, {package_dir!r})
+import main as game
+
+def run(window):
+    started_at = time.process_time()
+    canvas = asyncio.run(game.draw(window, years={years}, virtual_time=True, seed={seed}, backend={backend!r}, threaded_output={threaded}))
+    return time.process_time() - started_at, canvas.frames
+
+locale.setlocale(locale.LC_ALL, '')
+cpu, frames = curses.wrapper(run)
+with open({result_path!r}, 'w') as fh:
+    json.dump({{'cpu': cpu, 'frames': frames}}, fh)
+'''
+
+
+def run_render(backend, rows, columns, threaded=False, years=RENDER_YEARS):
+    """Прогнать игру на псевдотерминале rows x columns и вернуть (CPU на кадр, байт на кадр)."""
+    master, slave = os.openpty()
+    fcntl.ioctl(slave, termios.TIOCSWINSZ, struct.pack('HHHH', rows, columns, 0, 0))
+    env = dict(os.environ, TERM='xterm-256color', LINES=str(rows), COLUMNS=str(columns))
+
+    with tempfile.NamedTemporaryFile(suffix='.json', delete=False) as fh:
+        result_path = fh.name
+    code = RENDER_CHILD.format(
+        package_dir=PACKAGE_DIR, years=years, seed=SEED, backend=backend, threaded=threaded,
+        result_path=result_path,
+    )
+    child = subprocess.Popen([sys.executable, '-c', code], stdin=slave, stdout=slave, stderr=slave, env=env)
+    os.close(slave)
+
+    # Терминал надо читать, иначе дочерний процесс встанет на полном буфере
+    emitted = 0
+    while True:
+        ready, _, _ = select.select([master], [], [], 0.1)
+        if not ready:
+            if child.poll() is not None:
+                break
+            continue
+        try:
+            data = os.read(master, 65536)
+        except OSError:
+            break
+        if not data:
+            break
+        emitted += len(data)
+    child.wait()
+    os.close(master)
+
+    try:
+        with open(result_path, 'r', encoding='utf-8') as fh:
+            result = json.load(fh)
+    finally:
+        os.unlink(result_path)
+    return result['cpu'] / result['frames'], emitted / result['frames']
+
+
+def bench_render():
+    """Бэкенды вывода на больших терминалах, с потоком вывода и без: CPU и байты на терминал за кадр."""
+    results = {}
+    for rows, columns in RENDER_SIZES:
+        for backend in BACKENDS:
+            for threaded in (False, True):
+                samples, emitted = [], []
+                for _ in range(RENDER_RUNS):
+                    cpu_per_frame, bytes_per_frame = run_render(backend, rows, columns, threaded)
+                    samples.append(cpu_per_frame)
+                    emitted.append(bytes_per_frame)
+                name = f'{backend}+thread' if threaded else backend
+                results[f'render/{name}/{rows}x{columns}'] = _summary(
+                    samples, bytes_per_frame=statistics.median(emitted),
+                )
+    return results
+
+
+def run_loop(stars_count, garbage_delay, rows, columns, years=LOOP_YEARS):
+    """Прогнать игру в виртуальном времени и снять стоимость каждого тика."""
+    canvas = HeadlessCanvas(rows, columns)
+    # Прирост живых блоков памяти за тик — не число выделений: то, что тик
+    # выделил и сам же отпустил, в нём не видно. Выделения считают пулы игры:
+    # сколько записей им пришлось создать сверх уже созданных
+    tick_times, tick_calls, tick_blocks, tick_allocations = [], [], [], []
+    last = {'time': None, 'calls': 0, 'blocks': 0, 'allocations': 0}
+
+    def on_tick(tick):
+        now = time.perf_counter()
+        calls = sum(canvas.calls.values())
+        blocks = sys.getallocatedblocks()
+        allocations = sum(pool.allocations for pool in game.pools.values())
+        if last['time'] is not None:
+            tick_times.append(now - last['time'])
+            tick_calls.append(calls - last['calls'])
+            tick_blocks.append(blocks - last['blocks'])
+            tick_allocations.append(allocations - last['allocations'])
+        last.update(time=now, calls=calls, blocks=blocks, allocations=allocations)
+
+    scenario = default_scenario
+    if garbage_delay is not None:
+        scenario = Scenario(default_scenario.phrases, [(game.YEAR_START, garbage_delay)])
+
+    saved_stars_count = game.STARS_COUNT
+    game.STARS_COUNT = stars_count
+    clock.listeners.append(on_tick)
+    try:
+        started_at = time.perf_counter()
+        asyncio.run(game.draw(canvas, years=years, virtual_time=True, seed=SEED, scenario=scenario))
+        elapsed = time.perf_counter() - started_at
+    finally:
+        clock.listeners.remove(on_tick)
+        game.STARS_COUNT = saved_stars_count
+
+    return _summary(
+        tick_times,
+        ticks_per_second=len(tick_times) / elapsed,
+        curses_calls_per_tick=statistics.mean(tick_calls),
+        net_blocks_per_tick=statistics.mean(tick_blocks),
+        pool_allocations_per_tick=statistics.mean(tick_allocations),
+    )
+
+
+def bench_loop():
+    results = {}
+    default_rows, default_columns = TERMINAL_SIZES[0]
+    for stars_count in STARS_COUNTS:
+        for garbage_delay in GARBAGE_DELAYS:
+            name = f'loop/stars={stars_count}/delay={garbage_delay or "scenario"}/{default_rows}x{default_columns}'
+            results[name] = run_loop(stars_count, garbage_delay, default_rows, default_columns)
+    for rows, columns in TERMINAL_SIZES[1:]:
+        name = f'loop/stars={game.STARS_COUNT}/delay=scenario/{rows}x{columns}'
+        results[name] = run_loop(game.STARS_COUNT, None, rows, columns)
+    return results
+
+
+SUITES = {
+    'draw_frame': bench_draw_frame,
+    'get_frame_size': bench_get_frame_size,
+    'physics': bench_update_speed,
+    'collisions': bench_collisions,
+    'startup': bench_startup,
+    'render': bench_render,
+    'loop': bench_loop,
+}
+
+
+def compare(results, baseline, threshold=REGRESSION_THRESHOLD):
+    """Сравнить медианы с базовым прогоном и вернуть список регрессий."""
+    regressions = []
+    for name, current in sorted(results['scenarios'].items()):
+        previous = baseline['scenarios'].get(name)
+        if previous is None:
+            continue
+        ratio = current['median_us'] / previous['median_us'] if previous['median_us'] else 1.0
+        marker = ''
+        if ratio > 1 + threshold:
+            marker = '  REGRESSION'
+            regressions.append(name)
+        print(f'{name:60} {previous["median_us"]:10.2f} -> {current["median_us"]:10.2f} us  x{ratio:.2f}{marker}')
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Бенчмарки горячих путей игры.')
+    parser.add_argument('suites', nargs='*', help=f'какие наборы запускать ({", ".join(SUITES)}), по умолчанию все')
+    parser.add_argument('--output', help='сохранить результаты в JSON')
+    parser.add_argument('--compare', help='JSON прошлого прогона для поиска регрессий')
+    parser.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD)
+    args = parser.parse_args()
+    unknown = set(args.suites) - set(SUITES)
+    if unknown:
+        parser.error(f'неизвестные наборы: {", ".join(sorted(unknown))}')
+
+    scenarios = {}
+    for suite in args.suites or SUITES:
+        scenarios.update(SUITES[suite]())
+
+    results = {
+        'version': RESULTS_VERSION,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'seed': SEED,
+        'scenarios': scenarios,
+    }
+
+    for name, scenario in scenarios.items():
+        extra = ', '.join(
+            f'{key}={value:.1f}' for key, value in scenario.items()
+            if key not in ('median_us', 'p99_us', 'samples')
+        )
+        print(f'{name:60} median {scenario["median_us"]:10.2f} us  p99 {scenario["p99_us"]:10.2f} us  {extra}')
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as fh:
+            json.dump(results, fh, indent=2)
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as fh:
+            baseline = json.load(fh)
+        if compare(results, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
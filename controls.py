@@ -0,0 +1,109 @@
+import asyncio
+import collections
+import time
+
+from curses_tools import KEY_ACTIONS, apply_key_action
+from scheduler import clock
+
+# Сколько нажатий хранить, пока корабль их не забрал: автоповтор клавиш не переполнит очередь
+MAX_EVENTS = 64
+
+KeyEvent = collections.namedtuple('KeyEvent', 'time tick key_code action')
+
+
+class Controls:
+    """Ввод по событиям: клавиши читаются, как только терминал их прислал.
+
+    attach() регистрирует дескриптор терминала в цикле событий через
+    add_reader, и каждое нажатие сразу раскладывается по таблице
+    KEY_ACTIONS в очередь событий с временем и тиком прихода. Корабль
+    забирает очередь раз в тик через read(), поэтому нажатия между тиками
+    больше не теряются и не ждут опроса, а выстрел, нажатый дважды за тик,
+    срабатывает и на следующем тике.
+
+    Без attach() (холст в памяти, цикл без add_reader) read() сама
+    опрашивает getch, как раньше read_controls.
+
+    add_reader срабатывает по уровню: пока нажатие лежит непрочитанным в
+    fd, цикл событий зовёт poll() снова и снова. Поэтому, если окно занято
+    потоком вывода (canvas.input_blocked), poll() снимает дескриптор с
+    цикла и ставит его обратно, когда кадр дописан.
+    """
+
+    def __init__(self, canvas):
+        self.canvas = canvas
+        self.events = collections.deque(maxlen=MAX_EVENTS)
+        # Время от прихода самого раннего нажатия до его обработки, в секундах
+        self.latency = 0.0
+        self._loop = None
+        self._fd = None
+        # Дескриптор снят с цикла до конца кадра потока вывода
+        self._paused = False
+        self._pending_fire = False
+        # Если задан словарь, read() пишет в него забранные клавиши: {тик: коды}
+        self.history = None
+
+    def attach(self, fd):
+        """Читать ввод по готовности fd (номер или файл); вернуть False, если цикл событий так не умеет."""
+        loop = asyncio.get_running_loop()
+        try:
+            loop.add_reader(fd, self.poll)
+        except (NotImplementedError, ValueError, OSError):
+            return False
+        self._loop, self._fd = loop, fd
+        return True
+
+    def detach(self):
+        if self._loop is not None:
+            self._loop.remove_reader(self._fd)
+            self._loop = self._fd = None
+        self._paused = False
+
+    def poll(self):
+        """Забрать из окна все пришедшие клавиши и поставить их в очередь."""
+        while True:
+            key_code = self.canvas.getch()
+            if key_code == -1:
+                if self._loop is not None and not self._paused and getattr(self.canvas, 'input_blocked', False):
+                    self._pause()
+                break
+            action = KEY_ACTIONS.get(key_code)
+            if action is not None:
+                self.events.append(KeyEvent(time.perf_counter(), clock.tick, key_code, action))
+
+    def _pause(self):
+        self._paused = True
+        self._loop.remove_reader(self._fd)
+        loop = self._loop
+
+        def wake():
+            # Поток вывода зовёт из себя: обратно в цикл событий — через call_soon_threadsafe
+            if not loop.is_closed():
+                loop.call_soon_threadsafe(self._resume, loop)
+
+        self.canvas.call_when_input_ready(wake)
+
+    def _resume(self, loop):
+        if not self._paused or self._loop is not loop:
+            return
+        self._paused = False
+        loop.add_reader(self._fd, self.poll)
+
+    def read(self):
+        """Свернуть накопленные нажатия в (rows_direction, columns_direction, space_pressed)."""
+        # Остаток буфера curses и ввод без add_reader забираем здесь же
+        self.poll()
+
+        controls = (0, 0, self._pending_fire)
+        self._pending_fire = False
+        if self.events:
+            self.latency = time.perf_counter() - self.events[0].time
+            if self.history is not None:
+                self.history[clock.tick] = [event.key_code for event in self.events]
+        while self.events:
+            action = self.events.popleft().action
+            if action[2] and controls[2]:
+                # Второй выстрел за тик не пропадает, а переносится на следующий
+                self._pending_fire = True
+            controls = apply_key_action(controls, action)
+        return controls
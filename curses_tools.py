@@ -1,4 +1,5 @@
 import curses
+import re
 
 SPACE_KEY_CODE = 32
 LEFT_KEY_CODE = 260
@@ -13,11 +14,36 @@ S_KEY_CODE = ord('s')
 D_KEY_CODE = ord('d')
 
 
+# Что делает клавиша: (направление по строкам, направление по колонкам, выстрел)
+KEY_ACTIONS = {
+    UP_KEY_CODE: (-1, 0, False),
+    DOWN_KEY_CODE: (1, 0, False),
+    RIGHT_KEY_CODE: (0, 1, False),
+    LEFT_KEY_CODE: (0, -1, False),
+    W_KEY_CODE: (-1, 0, False),
+    S_KEY_CODE: (1, 0, False),
+    D_KEY_CODE: (0, 1, False),
+    A_KEY_CODE: (0, -1, False),
+    SPACE_KEY_CODE: (0, 0, True),
+}
+
+
+def apply_key_action(controls, action):
+    """Fold one key action into (rows_direction, columns_direction, space_pressed); the latest key wins per axis."""
+
+    rows_direction, columns_direction, space_pressed = controls
+    action_rows, action_columns, action_fire = action
+    return (
+        action_rows or rows_direction,
+        action_columns or columns_direction,
+        space_pressed or action_fire,
+    )
+
+
 def read_controls(canvas):
     """Read keys pressed and returns tuple witl controls state."""
 
-    rows_direction = columns_direction = 0
-    space_pressed = False
+    controls = (0, 0, False)
 
     while True:
         pressed_key_code = canvas.getch()
@@ -26,71 +52,102 @@ def read_controls(canvas):
             # https://docs.python.org/3/library/curses.html#curses.window.getch
             break
 
-        # Стрелки
-        if pressed_key_code == UP_KEY_CODE:
-            rows_direction = -1
+        action = KEY_ACTIONS.get(pressed_key_code)
+        if action is not None:
+            controls = apply_key_action(controls, action)
 
-        if pressed_key_code == DOWN_KEY_CODE:
-            rows_direction = 1
+    return controls
 
-        if pressed_key_code == RIGHT_KEY_CODE:
-            columns_direction = 1
 
-        if pressed_key_code == LEFT_KEY_CODE:
-            columns_direction = -1
+_NON_SPACE_RUN = re.compile(r'[^ ]+')
+_sprite_cache = {}
 
-        # WASD клавиши
-        if pressed_key_code == W_KEY_CODE:
-            rows_direction = -1
 
-        if pressed_key_code == S_KEY_CODE:
-            rows_direction = 1
+class Sprite:
+    """Precompiled frame: size plus contiguous non-space runs for every row."""
 
-        if pressed_key_code == D_KEY_CODE:
-            columns_direction = 1
+    __slots__ = ('text', 'rows', 'columns', 'runs', 'blank_runs')
 
-        if pressed_key_code == A_KEY_CODE:
-            columns_direction = -1
+    def __init__(self, text):
+        lines = text.splitlines()
+        self.text = text
+        self.rows = len(lines)
+        self.columns = max((len(line) for line in lines), default=0)
 
-        if pressed_key_code == SPACE_KEY_CODE:
-            space_pressed = True
+        runs = []
+        for row, line in enumerate(lines):
+            for match in _NON_SPACE_RUN.finditer(line):
+                runs.append((row, match.start(), match.group()))
+        self.runs = tuple(runs)
+        # Стирание пишет пробелы ровно поверх нарисованных отрезков
+        self.blank_runs = tuple((row, column, ' ' * len(chunk)) for row, column, chunk in runs)
 
-    return rows_direction, columns_direction, space_pressed
+    @classmethod
+    def from_runs(cls, text, rows, columns, runs):
+        """Build sprite from already computed size and runs, skipping the parsing."""
+        sprite = cls.__new__(cls)
+        sprite.text = text
+        sprite.rows = rows
+        sprite.columns = columns
+        sprite.runs = tuple((row, column, chunk) for row, column, chunk in runs)
+        sprite.blank_runs = tuple((row, column, ' ' * len(chunk)) for row, column, chunk in sprite.runs)
+        return sprite
 
+    def __repr__(self):
+        return f'Sprite(rows={self.rows}, columns={self.columns}, runs={len(self.runs)})'
 
-def draw_frame(canvas, start_row, start_column, text, negative=False):
-    """Draw multiline text fragment on canvas, erase text instead of drawing if negative=True is specified."""
+
+def get_sprite(frame):
+    """Return precompiled Sprite for text frame, building it once per distinct text."""
+
+    if isinstance(frame, Sprite):
+        return frame
+
+    sprite = _sprite_cache.get(frame)
+    if sprite is None:
+        sprite = _sprite_cache[frame] = Sprite(frame)
+    return sprite
+
+
+def draw_sprite(canvas, start_row, start_column, sprite, negative=False):
+    """Draw precompiled sprite with one addstr per run, erase it instead if negative=True is specified."""
 
     rows_number, columns_number = canvas.getmaxyx()
+    start_row = round(start_row)
+    start_column = round(start_column)
+    # Нижняя строка и правая колонка окна не используются, как и раньше
+    max_row = rows_number - 1
+    max_column = columns_number - 1
+
+    for row_offset, column_offset, chunk in sprite.blank_runs if negative else sprite.runs:
+        row = start_row + row_offset
+        if row < 0 or row >= max_row:
+            continue
 
-    for row, line in enumerate(text.splitlines(), round(start_row)):
-        if row < 0 or row >= rows_number - 1:
+        column = start_column + column_offset
+        if column < 0:
+            chunk = chunk[-column:]
+            column = 0
+        overflow = column + len(chunk) - max_column
+        if overflow > 0:
+            chunk = chunk[:-overflow]
+        if not chunk:
             continue
 
-        for column, symbol in enumerate(line, round(start_column)):
-            if column < 0 or column >= columns_number - 1:
-                continue
+        try:
+            canvas.addstr(row, column, chunk)
+        except curses.error:
+            continue
 
-            if symbol == ' ':
-                continue
 
-            # Check that current position it is not in a lower right corner of the window
-            if row == rows_number - 1 and column == columns_number - 1:
-                continue
+def draw_frame(canvas, start_row, start_column, text, negative=False):
+    """Draw multiline text fragment on canvas, erase text instead of drawing if negative=True is specified."""
 
-            try:
-                symbol = symbol if not negative else ' '
-                # Используем addch для одного символа - это безопаснее
-                canvas.addch(row, column, ord(symbol))
-            except (curses.error, ValueError):
-                # Skip problematic characters
-                continue
+    draw_sprite(canvas, start_row, start_column, get_sprite(text), negative)
 
 
 def get_frame_size(text):
     """Calculate size of multiline text fragment, return pair — number of rows and colums."""
 
-    lines = text.splitlines()
-    rows = len(lines)
-    columns = max([len(line) for line in lines])
-    return rows, columns
+    sprite = get_sprite(text)
+    return sprite.rows, sprite.columns
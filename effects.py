@@ -0,0 +1,89 @@
+from curses_tools import draw_sprite
+from pools import Pool
+from scheduler import clock
+
+
+class Effect:
+    """Запись эффекта: где он нарисован и его таймлайн — кадры по шагам, None — пустой шаг."""
+
+    __slots__ = ('corner_row', 'corner_column', 'timeline', 'started_at', 'step_ticks', 'drawn')
+
+    def __init__(self):
+        self.reset(0, 0, ())
+
+    def reset(self, corner_row, corner_column, timeline, started_at=0, step_ticks=1):
+        self.corner_row = corner_row
+        self.corner_column = corner_column
+        self.timeline = timeline
+        self.started_at = started_at
+        self.step_ticks = step_ticks
+        # Какой кадр сейчас на экране, чтобы стереть именно его
+        self.drawn = None
+
+
+class Effects:
+    """Система эффектов: все идущие анимации двигает главный тик, без задачи на каждую.
+
+    Эффект — запись из пула с таймлайном готовых спрайтов. Раз в тик система
+    считает по таймлайну кадр каждого эффекта и на выводимых кадрах рисует
+    все эффекты за один проход: сначала стирает сменившиеся кадры, затем
+    рисует текущие, поэтому наложенные взрывы не затирают друг друга.
+    Закончившиеся эффекты стираются и возвращаются в пул.
+    """
+
+    def __init__(self, canvas, capacity):
+        self.canvas = canvas
+        self.pool = Pool(Effect, capacity)
+        self.active = []
+
+    def __len__(self):
+        return len(self.active)
+
+    def start(self, corner_row, corner_column, timeline, step_ticks=1):
+        """Запустить эффект с этого тика; его первый кадр появится на этом же тике."""
+        effect = self.pool.acquire(corner_row, corner_column, timeline, clock.tick, step_ticks)
+        self.active.append(effect)
+        return effect
+
+    def advance(self):
+        """Шаг всех эффектов; рисует только на тиках, кадр которых попадёт на экран."""
+        tick, canvas = clock.tick, self.canvas
+        rendering = clock.rendering
+        current = []
+        finished = False
+
+        for effect in self.active:
+            step = (tick - effect.started_at) // effect.step_ticks
+            if step < len(effect.timeline):
+                sprite = effect.timeline[step]
+            else:
+                sprite = None
+                finished = True
+            current.append(sprite)
+            if rendering and effect.drawn is not None and effect.drawn is not sprite:
+                draw_sprite(canvas, effect.corner_row, effect.corner_column, effect.drawn, negative=True)
+                effect.drawn = None
+
+        if rendering:
+            for effect, sprite in zip(self.active, current):
+                if sprite is not None:
+                    draw_sprite(canvas, effect.corner_row, effect.corner_column, sprite)
+                    effect.drawn = sprite
+
+        if finished:
+            still_active = []
+            for effect in self.active:
+                if len(effect.timeline) > (tick - effect.started_at) // effect.step_ticks:
+                    still_active.append(effect)
+                elif effect.drawn is not None and not rendering:
+                    # Стереть последний кадр можно только на выводимом тике
+                    still_active.append(effect)
+                else:
+                    self.pool.release(effect)
+            self.active = still_active
+
+    async def run(self):
+        """Системная корутина эффектов: шаг раз в тик."""
+        while True:
+            self.advance()
+            await clock.sleep(1)
@@ -0,0 +1,105 @@
+from array import array
+
+
+class EntityStore:
+    """Однотипные сущности в параллельных массивах вместо отдельной корутины на объект.
+
+    Сущность — это номер слота: её строка, колонка, скорости, номер спрайта
+    и тик рождения лежат в массивах под этим номером, там же — откуда она
+    запущена (от этой точки системы считают положение равномерного полёта)
+    и где она нарисована сейчас, чтобы стереть её на следующем кадре. Слоты погибших
+    сущностей переиспользуются, поэтому массивы растут только до пикового
+    числа живых объектов. capacity слотов выделяется сразу; allocations
+    считает все когда-либо выделенные слоты и в установившемся режиме не растёт.
+    """
+
+    def __init__(self, capacity=0):
+        self.rows = array('d')
+        self.columns = array('d')
+        self.row_speeds = array('d')
+        self.column_speeds = array('d')
+        self.sprites = array('H')
+        self.born = array('q')
+        self.start_rows = array('d')
+        self.start_columns = array('d')
+        self.alive = bytearray()
+        self.drawn = bytearray()
+        self.drawn_rows = array('d')
+        self.drawn_columns = array('d')
+        # Объект на слот, если системе он нужен (например, препятствие мусора)
+        self.links = []
+        self._free = []
+        self._count = 0
+        self.allocations = 0
+        self.peak = 0
+        for _ in range(capacity):
+            self._append_slot()
+        # Свободные слоты выдаются с меньших номеров, как и при росте массивов
+        self._free = list(range(capacity - 1, -1, -1))
+
+    def __len__(self):
+        return self._count
+
+    @property
+    def capacity(self):
+        return len(self.alive)
+
+    def spawn(self, row, column, row_speed=0.0, column_speed=0.0, sprite=0, born=0, link=None):
+        """Занять слот под новую сущность и вернуть его номер."""
+        slot = self._free.pop() if self._free else self._append_slot()
+        self.rows[slot] = row
+        self.columns[slot] = column
+        self.row_speeds[slot] = row_speed
+        self.column_speeds[slot] = column_speed
+        self.sprites[slot] = sprite
+        self.born[slot] = born
+        self.start_rows[slot] = row
+        self.start_columns[slot] = column
+        self.alive[slot] = 1
+        self.drawn[slot] = 0
+        self.links[slot] = link
+        self._count += 1
+        if self._count > self.peak:
+            self.peak = self._count
+        return slot
+
+    def kill(self, slot):
+        """Освободить слот; повторный вызов для мёртвого слота ничего не делает."""
+        if not self.alive[slot]:
+            return
+        self.alive[slot] = 0
+        self.links[slot] = None
+        self._free.append(slot)
+        self._count -= 1
+
+    def slots(self):
+        """Номера живых слотов по возрастанию."""
+        alive = self.alive
+        return [slot for slot in range(len(alive)) if alive[slot]]
+
+    def stats(self):
+        return {
+            'capacity': self.capacity,
+            'in_use': self._count,
+            'peak': self.peak,
+            'allocations': self.allocations,
+        }
+
+    def _append_slot(self):
+        """Дорастить массивы на один пустой слот и вернуть его номер."""
+        slot = len(self.alive)
+        self.rows.append(0.0)
+        self.columns.append(0.0)
+        self.row_speeds.append(0.0)
+        self.column_speeds.append(0.0)
+        self.sprites.append(0)
+        self.born.append(0)
+        self.start_rows.append(0.0)
+        self.start_columns.append(0.0)
+        self.alive.append(0)
+        self.drawn.append(0)
+        self.drawn_rows.append(0.0)
+        self.drawn_columns.append(0.0)
+        self.links.append(None)
+        self.allocations += 1
+        return slot
@@ -1,8 +1,7 @@
-import asyncio
-import curses
-from curses_tools import draw_frame, get_frame_size
+from curses_tools import Sprite
+from governor import quality
 
-EXPLOSION_FRAMES = [
+EXPLOSION_TEXTS = [
     """           (_)
        (  (   (  (
       () (  (  )
@@ -25,16 +24,22 @@ EXPLOSION_FRAMES = [
     """,
 ]
 
-FRAME_DELAY = 0.1
+EXPLOSION_FRAMES = [Sprite(text) for text in EXPLOSION_TEXTS]
 
-async def explode(canvas, center_row, center_column):
-    rows, columns = get_frame_size(EXPLOSION_FRAMES[0])
-    corner_row = round(center_row - rows / 2)
-    corner_column = round(center_column - columns / 2)
+FRAME_DELAY_TICS = 1
 
-    curses.beep()
-    for frame in EXPLOSION_FRAMES:
-        draw_frame(canvas, corner_row, corner_column, frame)
-        await asyncio.sleep(FRAME_DELAY)
-        draw_frame(canvas, corner_row, corner_column, frame, negative=True)
-        await asyncio.sleep(FRAME_DELAY)
+# Каждый кадр виден FRAME_DELAY_TICS тиков, затем столько же тиков стёрт
+EXPLOSION_TIMELINE = tuple(step for frame in EXPLOSION_FRAMES for step in (frame, None))
+# Облегчённый взрыв для регулятора качества: каждый второй кадр
+EXPLOSION_LITE_TIMELINE = tuple(step for frame in EXPLOSION_FRAMES[::2] for step in (frame, None))
+
+
+def explode(canvas, effects, center_row, center_column):
+    """Запустить взрыв с центром в точке как эффект: ждать его окончания не нужно."""
+    first_frame = EXPLOSION_FRAMES[0]
+    corner_row = round(center_row - first_frame.rows / 2)
+    corner_column = round(center_column - first_frame.columns / 2)
+
+    canvas.beep()
+    timeline = EXPLOSION_LITE_TIMELINE if quality.explosion_lite else EXPLOSION_TIMELINE
+    effects.start(corner_row, corner_column, timeline, FRAME_DELAY_TICS)
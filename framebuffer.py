@@ -0,0 +1,307 @@
+import collections
+import curses
+import threading
+
+from backends import CursesBackend
+
+# Сколько готовых кадров может ждать потока вывода; лишние сливаются с самым новым
+WRITER_QUEUE_DEPTH = 2
+
+
+class FrameWriter:
+    """Вывод кадров на бэкенд: помнит, что показано на экране, и пишет только изменения.
+
+    Кадр — словарь {строка: (символы, атрибуты)} с изменёнными строками
+    буфера. write() сравнивает их с показанным, склеивает изменённые
+    клетки в отрезки и отдаёт их бэкенду, после чего один раз вызывает
+    flush().
+    """
+
+    def __init__(self, backend, rows, columns, beep=None):
+        self.backend = backend
+        self.rows, self.columns = rows, columns
+        self._beep = beep
+        self._shown_chars = [[' '] * columns for _ in range(rows)]
+        self._shown_attrs = [[0] * columns for _ in range(rows)]
+        # Статистика последнего кадра и накопительные счётчики
+        self.writes = 0
+        self.cells = 0
+        self.writes_total = 0
+        self.frames = 0
+
+    def submit(self, frame):
+        """Вывести кадр сразу, в потоке вызывающего."""
+        self.write(frame)
+
+    def beep(self):
+        self._beep()
+
+    def border(self):
+        self.backend.border()
+
+    def close(self):
+        """Для вывода в своём потоке дописывает очередь; здесь делать нечего."""
+
+    def write(self, frame):
+        backend, columns = self.backend, self.columns
+        writes = cells = 0
+
+        for row in sorted(frame):
+            chars, attrs = frame[row]
+            shown_chars, shown_attrs = self._shown_chars[row], self._shown_attrs[row]
+            column = 0
+            while column < columns:
+                if chars[column] == shown_chars[column] and attrs[column] == shown_attrs[column]:
+                    column += 1
+                    continue
+
+                start, attr = column, attrs[column]
+                while (
+                    column < columns and attrs[column] == attr
+                    and (chars[column] != shown_chars[column] or attrs[column] != shown_attrs[column])
+                ):
+                    column += 1
+
+                shown_chars[start:column] = chars[start:column]
+                shown_attrs[start:column] = attrs[start:column]
+                backend.draw(row, start, ''.join(chars[start:column]), attr)
+                writes += 1
+                cells += column - start
+
+        backend.flush()
+        self.writes = writes
+        self.cells = cells
+        self.writes_total += writes
+        self.frames += 1
+
+
+class ThreadedFrameWriter(FrameWriter):
+    """Вывод кадров в отдельном потоке: медленный терминал не останавливает цикл событий.
+
+    submit() только кладёт снимок кадра в очередь из depth мест и сразу
+    возвращается. Поток вывода забирает кадры по одному и пишет их на
+    бэкенд. Если терминал не успевает и очередь полна, последний
+    ожидающий кадр не выводится: его строки сливаются с новым кадром,
+    и на экран попадает сразу самое свежее состояние. Такие кадры
+    считает dropped_frames.
+
+    Бэкенд, который пишет через окно curses (uses_window), нельзя трогать
+    из двух потоков сразу: поток вывода держит lock, пока пишет кадр, а
+    ввод через FrameBuffer.getch в это время не ждёт его, а пропускает опрос.
+    Кто пропустил опрос, может попросить call_when_idle() позвать его,
+    как только кадр дописан.
+    """
+
+    def __init__(self, backend, rows, columns, beep=None, depth=WRITER_QUEUE_DEPTH):
+        super().__init__(backend, rows, columns, beep)
+        self.depth = depth
+        self.lock = threading.Lock()
+        self.dropped_frames = 0
+        self._queue = collections.deque()
+        self._beeps = 0
+        # Пишет ли поток кадр сейчас и кого позвать, когда допишет
+        self._writing = False
+        self._idle_callbacks = []
+        self._closing = False
+        self._error = None
+        self._ready = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name='frame-writer', daemon=True)
+        self._thread.start()
+
+    @property
+    def queued(self):
+        """Сколько кадров ждут вывода."""
+        return len(self._queue)
+
+    def submit(self, frame):
+        """Поставить снимок кадра в очередь; не ждёт терминала никогда."""
+        self._raise_error()
+        with self._ready:
+            if len(self._queue) >= self.depth:
+                stale = self._queue.pop()
+                stale.update(frame)
+                frame = stale
+                self.dropped_frames += 1
+            self._queue.append(frame)
+            self._ready.notify()
+
+    def beep(self):
+        # Звук уходит на терминал из потока вывода вместе с ближайшим кадром
+        with self._ready:
+            self._beeps += 1
+            self._ready.notify()
+
+    def border(self):
+        with self.lock:
+            self.backend.border()
+
+    def call_when_idle(self, callback):
+        """Позвать callback, когда поток вывода отпустит lock: сразу или из потока вывода."""
+        with self._ready:
+            if self._writing:
+                self._idle_callbacks.append(callback)
+                return
+        callback()
+
+    def close(self):
+        """Дописать очередь, остановить поток и передать дальше его ошибку, если она была."""
+        with self._ready:
+            self._closing = True
+            self._ready.notify()
+        self._thread.join()
+        self._raise_error()
+
+    def _run(self):
+        while True:
+            with self._ready:
+                while not self._queue and not self._beeps and not self._closing:
+                    self._ready.wait()
+                if not self._queue and not self._beeps:
+                    return
+                frame = self._queue.popleft() if self._queue else None
+                beeps, self._beeps = self._beeps, 0
+                # Флаг ставится до lock: кто не смог взять lock, застанет его и дождётся вызова
+                self._writing = True
+            try:
+                with self.lock:
+                    if frame is not None:
+                        self.write(frame)
+                    for _ in range(beeps):
+                        self._beep()
+            except Exception as error:
+                # Поток вывода не должен молча умереть: ошибку увидит следующий submit()
+                self._error = error
+                return
+            finally:
+                with self._ready:
+                    self._writing = False
+                    callbacks, self._idle_callbacks = self._idle_callbacks, []
+                for callback in callbacks:
+                    callback()
+
+    def _raise_error(self):
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise RuntimeError('frame writer thread failed') from error
+
+
+class FrameBuffer:
+    """Внеэкранный холст: корутины рисуют в память, а на терминал уходят только изменения.
+
+    Повторяет ту часть API окна curses, которой пользуется игра, поэтому
+    передаётся корутинам вместо настоящего окна. Раз в тик present()
+    отдаёт изменённые строки FrameWriter, который склеивает изменённые
+    клетки в отрезки для бэкенда вывода (backends.py) — по умолчанию окна
+    curses с ровно одним refresh на кадр. С threaded=True кадр уходит
+    снимком в очередь ThreadedFrameWriter, и в терминал пишет отдельный поток.
+    """
+
+    def __init__(self, window, backend=None, threaded=False):
+        self.window = window
+        self.backend = backend if backend is not None else CursesBackend(window)
+        self.rows, self.columns = window.getmaxyx()
+        self.threaded = threaded
+        writer_class = ThreadedFrameWriter if threaded else FrameWriter
+        self.writer = writer_class(self.backend, self.rows, self.columns, beep=self._beep)
+        self._chars = [[' '] * self.columns for _ in range(self.rows)]
+        self._attrs = [[0] * self.columns for _ in range(self.rows)]
+        self._dirty_rows = set()
+        # Сколько кадров отдано на вывод
+        self.frames = 0
+
+    @property
+    def writes(self):
+        return self.writer.writes
+
+    @property
+    def cells(self):
+        return self.writer.cells
+
+    @property
+    def writes_total(self):
+        return self.writer.writes_total
+
+    def getmaxyx(self):
+        return self.rows, self.columns
+
+    def addch(self, row, column, symbol, attr=0):
+        if isinstance(symbol, int):
+            attr |= symbol & ~curses.A_CHARTEXT
+            symbol = chr(symbol & curses.A_CHARTEXT)
+        self.addstr(row, column, symbol, attr)
+
+    def addstr(self, row, column, text, attr=0):
+        if not 0 <= row < self.rows:
+            return
+        # Всё, что не помещается в окно, молча обрезается
+        if column < 0:
+            text = text[-column:]
+            column = 0
+        text = text[:self.columns - column]
+        if not text:
+            return
+
+        end = column + len(text)
+        self._chars[row][column:end] = text
+        self._attrs[row][column:end] = [attr] * len(text)
+        self._dirty_rows.add(row)
+
+    @property
+    def input_blocked(self):
+        """Может ли getch() сейчас не дойти до окна: его держит поток вывода."""
+        return self.threaded and self.backend.uses_window and self.writer.lock.locked()
+
+    def call_when_input_ready(self, callback):
+        """Позвать callback, когда getch() снова дойдёт до окна; может позвать из потока вывода."""
+        if self.threaded and self.backend.uses_window:
+            self.writer.call_when_idle(callback)
+        else:
+            callback()
+
+    def getch(self):
+        if self.threaded and self.backend.uses_window:
+            # Окно curses сейчас пишет поток вывода: нажатие подождёт в буфере терминала до конца кадра
+            if not self.writer.lock.acquire(blocking=False):
+                return -1
+            try:
+                return self.window.getch()
+            finally:
+                self.writer.lock.release()
+        return self.window.getch()
+
+    def nodelay(self, flag):
+        self.window.nodelay(flag)
+
+    def border(self):
+        # Рамка рисуется бэкендом напрямую: её клетки в буфере никогда не меняются
+        self.writer.border()
+
+    def refresh(self):
+        """Ничего не делает: экран обновляет только present()."""
+
+    def beep(self):
+        self.writer.beep()
+
+    def _beep(self):
+        # У окна curses нет beep(), у заменителей окна (headless) — есть
+        window_beep = getattr(self.window, 'beep', None)
+        if window_beep is not None:
+            window_beep()
+        else:
+            curses.beep()
+
+    def present(self):
+        """Отдать на вывод строки, изменённые с прошлого кадра."""
+        chars, attrs = self._chars, self._attrs
+        if self.threaded:
+            # Поток вывода получает копии строк: корутины тем временем рисуют следующий кадр
+            frame = {row: (chars[row][:], attrs[row][:]) for row in self._dirty_rows}
+        else:
+            frame = {row: (chars[row], attrs[row]) for row in self._dirty_rows}
+        self._dirty_rows.clear()
+        self.writer.submit(frame)
+        self.frames += 1
+
+    def close(self):
+        """Дождаться вывода всех отданных кадров."""
+        self.writer.close()
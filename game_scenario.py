@@ -1,27 +1,141 @@
-PHRASES = {
-    # Только на английском, Repl.it ломается на кириллице
-    1957: "First Sputnik",
-    1961: "Gagarin flew!",
-    1969: "Armstrong got on the moon!",
-    1971: "First orbital space station Salute-1",
-    1981: "Flight of the Shuttle Columbia",
-    1998: 'ISS start building',
-    2011: 'Messenger launch to Mercury',
-    2020: "Take the plasma gun! Shoot the garbage!",
-}
-
-def get_garbage_delay_tics(year):
-    if year < 1961:
-        return None
-    elif year < 1969:
-        return 20
-    elif year < 1981:
-        return 14
-    elif year < 1995:
-        return 10
-    elif year < 2010:
-        return 8
-    elif year < 2020:
-        return 6
-    else:
-        return 2
\ No newline at end of file
+import bisect
+import collections
+import json
+import os
+
+SCENARIOS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'scenarios')
+DEFAULT_SCENARIO_PATH = os.path.join(SCENARIOS_DIR, 'default.json')
+
+# Сколько запусков мусора держать рассчитанными наперёд
+SPAWN_AHEAD = 64
+# Дальше скольких тиков вперёд расписание не заглядывает
+SPAWN_HORIZON_TICKS = 1000
+
+Spawn = collections.namedtuple('Spawn', 'tick sprite column speed')
+
+
+class Scenario:
+    """Сценарий игры из файла данных: события по годам и темп мусора.
+
+    garbage_delays — точки перелома [(год, задержка в тиках), ...] по
+    возрастанию года: задержка действует с этого года до следующей точки,
+    до первой мусора нет. Фраза события показывается phrase_years лет.
+    Год ищется в точках перелома через bisect, без лестницы if/elif.
+
+    garbage_speed_range и fire_speed — необязательные параметры баланса:
+    диапазон скоростей мусора и скорость снаряда. None — значения по
+    умолчанию из main.py.
+    """
+
+    def __init__(self, phrases, garbage_delays, phrase_years=3, garbage_speed_range=None, fire_speed=None):
+        self.phrases = dict(phrases)
+        self.phrase_years = phrase_years
+        self.garbage_speed_range = tuple(garbage_speed_range) if garbage_speed_range is not None else None
+        self.fire_speed = fire_speed
+        self.garbage_delays = sorted((year, delay) for year, delay in garbage_delays)
+        self._delay_years = [year for year, _ in self.garbage_delays]
+        self._phrase_years = sorted(self.phrases)
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            {int(year): phrase for year, phrase in data['phrases'].items()},
+            data['garbage_delays'],
+            data.get('phrase_years', 3),
+            data.get('garbage_speed_range'),
+            data.get('fire_speed'),
+        )
+
+    def to_dict(self):
+        data = {
+            'phrases': {str(year): phrase for year, phrase in sorted(self.phrases.items())},
+            'phrase_years': self.phrase_years,
+            'garbage_delays': [list(point) for point in self.garbage_delays],
+        }
+        if self.garbage_speed_range is not None:
+            data['garbage_speed_range'] = list(self.garbage_speed_range)
+        if self.fire_speed is not None:
+            data['fire_speed'] = self.fire_speed
+        return data
+
+    def garbage_delay_tics(self, year):
+        """Пауза между запусками мусора в этом году или None, если мусора ещё нет."""
+        index = bisect.bisect_right(self._delay_years, year) - 1
+        if index < 0:
+            return None
+        return self.garbage_delays[index][1]
+
+    def phrase(self, year):
+        """Фраза последнего события, если оно случилось не раньше phrase_years лет назад."""
+        index = bisect.bisect_right(self._phrase_years, year) - 1
+        if index < 0:
+            return ''
+        phrase_year = self._phrase_years[index]
+        if year - phrase_year >= self.phrase_years:
+            return ''
+        return self.phrases[phrase_year]
+
+
+def load_scenario(path=DEFAULT_SCENARIO_PATH):
+    # Тексты в файлах сценариев только на английском, Repl.it ломается на кириллице
+    with open(path, 'r', encoding='utf-8') as fh:
+        return Scenario.from_dict(json.load(fh))
+
+
+class SpawnSchedule:
+    """Расписание запусков мусора, рассчитанное наперёд в кольцевой буфер.
+
+    Генератор со своим сидом проходит по тикам, берёт задержку из
+    delay_tics(year_at(tick)) и заранее выбирает кадр, колонку и скорость
+    каждого запуска. Системе мусора остаётся забрать из буфера запуски,
+    чей тик наступил; буфер доливается, когда пустеет наполовину, но не
+    дальше SPAWN_HORIZON_TICKS вперёд — годы без мусора не просчитываются
+    до бесконечности.
+    """
+
+    def __init__(self, rng, delay_tics, year_at, frame_columns, columns, speed_range, border=1, start_tick=0):
+        self.rng = rng
+        self.delay_tics = delay_tics
+        self.year_at = year_at
+        self.frame_columns = frame_columns
+        self.columns = columns
+        self.speed_range = speed_range
+        self.border = border
+        self._next_tick = start_tick
+        self._buffer = collections.deque(maxlen=SPAWN_AHEAD)
+        self._refill(start_tick)
+
+    def _refill(self, tick):
+        buffer, rng, border = self._buffer, self.rng, self.border
+        horizon = tick + SPAWN_HORIZON_TICKS
+        while len(buffer) < SPAWN_AHEAD and self._next_tick <= horizon:
+            spawn_tick = self._next_tick
+            delay = self.delay_tics(self.year_at(spawn_tick))
+            if delay is None:
+                self._next_tick += 1
+                continue
+            sprite = rng.randrange(len(self.frame_columns))
+            max_column = max(self.columns - self.frame_columns[sprite] - border, border)
+            buffer.append(Spawn(spawn_tick, sprite, rng.randint(border, max_column), rng.uniform(*self.speed_range)))
+            self._next_tick += delay
+
+    def pop_due(self, tick):
+        """Забрать запуски, чей тик уже наступил."""
+        buffer = self._buffer
+        due = []
+        while buffer and buffer[0].tick <= tick:
+            due.append(buffer.popleft())
+        if len(buffer) < SPAWN_AHEAD // 2:
+            self._refill(tick)
+        return due
+
+    def peek(self):
+        """Рассчитанные наперёд запуски, не забирая их из буфера."""
+        return list(self._buffer)
+
+
+scenario = load_scenario()
+
+# Сценарий по умолчанию в прежнем виде: словарь событий и функция темпа
+PHRASES = scenario.phrases
+get_garbage_delay_tics = scenario.garbage_delay_tics
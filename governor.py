@@ -0,0 +1,127 @@
+import json
+import time
+
+from scheduler import clock
+
+# Во сколько раз реже обновляется мерцание звёзд, когда его сбросили
+STAR_STRIDE = 4
+# Во сколько раз реже выводятся кадры на последней ступени
+RENDER_STRIDE = 2
+
+# Нагрузка — доля бюджета тика (и полосы терминала), сглаженная по тикам
+PRESSURE_HIGH = 0.9
+PRESSURE_LOW = 0.5
+PRESSURE_SMOOTHING = 0.2
+# Сколько тиков подряд нагрузка должна держаться выше/ниже порога до смены качества
+DEGRADE_TICKS = 10
+RESTORE_TICKS = 50
+
+
+class Quality:
+    """Текущие уровни детализации, которые читают системы игры."""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.star_stride = 1
+        self.explosion_lite = False
+        self.render_stride = 1
+
+
+quality = Quality()
+
+# Что сбрасывается первым: (имя ступени, атрибут quality, значение при сброшенной ступени).
+# Года и фразы здесь нет: show_year_info пишет две строки в буфер кадра на выводимом
+# тике (единицы микросекунд), а неизменные клетки FrameWriter на терминал не шлёт.
+# Реже писать их нельзя — стёртые мусором буквы не восстановятся до следующей записи;
+# а сбрасывать тут нечего, ступень только отнимала бы DEGRADE_TICKS перегрузки.
+SHED_ORDER = (
+    ('stars', 'star_stride', STAR_STRIDE),
+    ('explosions', 'explosion_lite', True),
+    ('fps', 'render_stride', RENDER_STRIDE),
+)
+
+
+class QualityGovernor:
+    """Регулятор качества: под нагрузкой сбрасывает детализацию по ступеням SHED_ORDER.
+
+    Слушатель игровых часов. После каждого тика считает нагрузку — время
+    работы тика против tic_timeout и, если задан byte_budget, байты на
+    терминал против бюджета байт на тик — и сглаживает её. Нагрузка выше
+    PRESSURE_HIGH DEGRADE_TICKS тиков подряд сбрасывает следующую ступень,
+    ниже PRESSURE_LOW RESTORE_TICKS тиков подряд — возвращает последнюю
+    сброшенную. Разрыв между порогами и разная выдержка не дают качеству
+    дёргаться туда-обратно. Каждая смена попадает в changes и, если задан
+    log_path, в файл JSON lines.
+    """
+
+    def __init__(self, tic_timeout, bytes_total=None, byte_budget=None, log_path=None):
+        self.tic_timeout = tic_timeout
+        # Функция без аргументов: сколько байт ушло на терминал за всё время
+        self.bytes_total = bytes_total
+        self.byte_budget = byte_budget
+        self.level = 0
+        self.pressure = 0.0
+        self.changes = []
+        self._above = 0
+        self._below = 0
+        self._last_bytes = bytes_total() if bytes_total is not None else 0
+        self._last_render_tick = clock.tick
+        self._file = open(log_path, 'w', encoding='utf-8') if log_path else None
+        quality.reset()
+        clock.render_stride = 1
+
+    def on_tick(self, tick):
+        """Слушатель игровых часов: измерить нагрузку тика и при необходимости сменить качество."""
+        load = (time.perf_counter() - clock.tick_started_at) / self.tic_timeout
+        if self.byte_budget and self.bytes_total is not None and clock.rendering:
+            # Байты уходят только с кадром: делим на все тики с прошлого кадра
+            written = self.bytes_total()
+            ticks = max(tick - self._last_render_tick, 1)
+            load = max(load, (written - self._last_bytes) / (self.byte_budget * ticks))
+            self._last_bytes = written
+            self._last_render_tick = tick
+        self.pressure += (load - self.pressure) * PRESSURE_SMOOTHING
+
+        if self.pressure > PRESSURE_HIGH:
+            self._above += 1
+            self._below = 0
+        elif self.pressure < PRESSURE_LOW:
+            self._below += 1
+            self._above = 0
+        else:
+            self._above = self._below = 0
+
+        if self._above >= DEGRADE_TICKS and self.level < len(SHED_ORDER):
+            self._set_level(tick, self.level + 1)
+        elif self._below >= RESTORE_TICKS and self.level > 0:
+            self._set_level(tick, self.level - 1)
+
+    def _set_level(self, tick, level):
+        shed = level > self.level
+        name, attribute, value = SHED_ORDER[self.level if shed else level]
+        setattr(quality, attribute, value if shed else getattr(Quality(), attribute))
+        clock.render_stride = quality.render_stride
+        self.level = level
+        self._above = self._below = 0
+
+        change = {
+            'tick': tick,
+            'time': time.time(),
+            'step': name,
+            'action': 'shed' if shed else 'restore',
+            'level': level,
+            'pressure': round(self.pressure, 3),
+        }
+        self.changes.append(change)
+        if self._file is not None:
+            self._file.write(json.dumps(change) + '\n')
+            self._file.flush()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        quality.reset()
+        clock.render_stride = 1
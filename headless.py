@@ -0,0 +1,112 @@
+import argparse
+import asyncio
+import collections
+import curses
+import time
+
+from scheduler import clock
+
+DEFAULT_ROWS = 40
+DEFAULT_COLUMNS = 120
+
+
+class HeadlessCanvas:
+    """Заменитель окна curses поверх сетки в памяти: для запуска игры без терминала.
+
+    keys — сценарий ввода: словарь {номер тика: коды клавиш}. getch отдаёт
+    клавиши текущего тика игровых часов, а затем -1, как окно в nodelay.
+    """
+
+    def __init__(self, rows=DEFAULT_ROWS, columns=DEFAULT_COLUMNS, keys=None):
+        self.rows = rows
+        self.columns = columns
+        self.chars = [[' '] * columns for _ in range(rows)]
+        self.attrs = [[0] * columns for _ in range(rows)]
+        self.keys = keys or {}
+        self.calls = collections.Counter()
+        self._pending_keys = collections.deque()
+        self._keys_tick = None
+
+    def getmaxyx(self):
+        return self.rows, self.columns
+
+    def addch(self, row, column, symbol, attr=0):
+        self.calls['addch'] += 1
+        if isinstance(symbol, int):
+            attr |= symbol & ~curses.A_CHARTEXT
+            symbol = chr(symbol & curses.A_CHARTEXT)
+        self._put(row, column, symbol, attr)
+
+    def addstr(self, row, column, text, attr=0):
+        self.calls['addstr'] += 1
+        self._put(row, column, text, attr)
+
+    def getch(self):
+        self.calls['getch'] += 1
+        if self._keys_tick != clock.tick:
+            self._keys_tick = clock.tick
+            self._pending_keys.extend(self.keys.get(clock.tick, ()))
+        if self._pending_keys:
+            return self._pending_keys.popleft()
+        return -1
+
+    def border(self):
+        self.calls['border'] += 1
+        last_row, last_column = self.rows - 1, self.columns - 1
+        for row in range(self.rows):
+            self.chars[row][0] = self.chars[row][last_column] = '|'
+        self.chars[0] = ['+'] + ['-'] * (last_column - 1) + ['+']
+        self.chars[last_row] = list(self.chars[0])
+
+    def nodelay(self, flag):
+        self.calls['nodelay'] += 1
+
+    def refresh(self):
+        self.calls['refresh'] += 1
+
+    def beep(self):
+        self.calls['beep'] += 1
+
+    def dump(self):
+        """Вернуть содержимое экрана текстом — удобно для отладки и сравнения кадров."""
+        return '\n'.join(''.join(line) for line in self.chars)
+
+    def _put(self, row, column, text, attr):
+        # Как и curses, ругаемся только на начало записи за пределами окна
+        if not (0 <= row < self.rows and 0 <= column < self.columns):
+            raise curses.error(f'addstr() returned ERR at ({row}, {column})')
+        text = text[:self.columns - column]
+        end = column + len(text)
+        self.chars[row][column:end] = text
+        self.attrs[row][column:end] = [attr] * len(text)
+
+
+def run_headless(years, rows=DEFAULT_ROWS, columns=DEFAULT_COLUMNS, keys=None, seed=None):
+    """Прогнать игру без терминала на years игровых лет в виртуальном времени."""
+    import main as game
+
+    canvas = HeadlessCanvas(rows, columns, keys)
+    asyncio.run(game.draw(canvas, years=years, virtual_time=True, seed=seed))
+    return canvas
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Запуск игры без терминала в виртуальном времени.')
+    parser.add_argument('--years', type=int, default=70, help='сколько игровых лет прогнать')
+    parser.add_argument('--rows', type=int, default=DEFAULT_ROWS)
+    parser.add_argument('--columns', type=int, default=DEFAULT_COLUMNS)
+    parser.add_argument('--seed', type=int, help='сид генератора игры')
+    parser.add_argument('--show', action='store_true', help='напечатать последний кадр')
+    args = parser.parse_args()
+
+    started_at = time.perf_counter()
+    canvas = run_headless(args.years, args.rows, args.columns, seed=args.seed)
+    elapsed = time.perf_counter() - started_at
+
+    if args.show:
+        print(canvas.dump())
+    print(f'{clock.tick} ticks in {elapsed:.2f} s ({clock.tick / elapsed:.0f} ticks/s)')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,13 +1,32 @@
+import argparse
 import asyncio
 import curses
+import hashlib
 import random
-import itertools
 import locale
-from curses_tools import draw_frame, read_controls, get_frame_size
-from physics import update_speed
-from obstacles import Obstacle
+import sys
+from assets import load_sprite
+from curses_tools import draw_frame, draw_sprite, get_frame_size
+from controls import Controls
+from obstacles import Obstacle, ObstacleRegistry
+from entities import EntityStore
+from pools import Pool
+from effects import Effects
 from explosion import explode
-from game_scenario import PHRASES, get_garbage_delay_tics
+from backends import BACKENDS, make_backend
+from framebuffer import FrameBuffer
+from governor import QualityGovernor
+from metrics import TickMetrics
+from tracing import TracedBackend, Tracer
+from game_scenario import SpawnSchedule, load_scenario, scenario as default_scenario
+from scheduler import clock
+from stars import StarField
+from replay import SessionRecorder
+from world import (
+    TICK_ORDER, Rules, Ship, World, bullet_checked, bullet_in_field, bullet_moves, fire_origin, fire_unlocked, flown,
+    garbage_bottom,
+)
+from autopilot import Autopilot
 
 # Глобальные константы
 TIC_TIMEOUT = 0.1
@@ -20,12 +39,19 @@ BORDER_WIDTH = 1
 SPACESHIP_SIZE = 10  # Размер корабля для проверки границ
 HINT_OFFSET = 2  # Отступ для подсказки
 HINT_LONG_OFFSET = 40  # Отступ для длинной подсказки
+HUD_OFFSET = 12  # Место под «Year: NNNN» слева от счётчиков
 
 # Анимация звезд
 STAR_DIM_DURATION = 20
 STAR_NORMAL_DURATION = 3
 STAR_BOLD_DURATION = 5
 STAR_OFFSET_MAX = 100
+STAR_PHASES = (
+    (curses.A_DIM, STAR_DIM_DURATION),
+    (curses.A_NORMAL, STAR_NORMAL_DURATION),
+    (curses.A_BOLD, STAR_BOLD_DURATION),
+    (curses.A_NORMAL, STAR_NORMAL_DURATION),
+)
 
 # Анимация выстрела
 FIRE_FLASH_DURATION = 2
@@ -48,50 +74,63 @@ YEAR_START = 1957
 YEAR_SECONDS = 1.5
 YEAR_TICS = max(1, int(YEAR_SECONDS / TIC_TIMEOUT))
 
+# Частота вывода кадров на экран, не больше частоты тиков симуляции
+RENDER_FPS = 1 / TIC_TIMEOUT
+
 FIRE_UNLOCK_YEAR = 2020
 
-obstacles = []
-obstacles_in_last_collisions = []
+# Сколько записей пулы и хранилища выделяют сразу; при нехватке они дорастают сами
+GARBAGE_POOL_SIZE = 64
+BULLET_POOL_SIZE = 32
+EFFECT_POOL_SIZE = 16
+
+obstacles = ObstacleRegistry()
+obstacles_in_last_collisions = set()
+obstacle_pool = Pool(Obstacle, GARBAGE_POOL_SIZE)
+# Пулы и хранилища текущей игры, их заполняет draw(): у каждого есть stats() с занятостью и числом выделений
+pools = {}
+
+# Собственный генератор игры: с одним сидом мир повторяется тик в тик
+rng = random.Random()
 
 year = YEAR_START
+# Тик, на котором корабль столкнулся с мусором, или None, пока он цел
+crash_tick = None
+
+GAME_OVER_FILE = 'frames/gameover.txt'
+ROCKET_FILES = [
+    'frames/rocket_frame_1.txt',
+    'frames/rocket_frame_2.txt',
+]
 
-with open('frames/gameover.txt', 'r', encoding='utf-8') as fh:
-    GAME_OVER_FRAME = fh.read()
 
 def load_rocket_frames():
-    """Загружает кадры анимации ракеты из файлов."""
-    with open('frames/rocket_frame_1.txt', 'r', encoding='utf-8') as f:
-        frame1 = f.read()
-    with open('frames/rocket_frame_2.txt', 'r', encoding='utf-8') as f:
-        frame2 = f.read()
-    return [frame1, frame2]
+    """Загружает кадры анимации ракеты из пакета кадров."""
+    return [load_sprite(path) for path in ROCKET_FILES]
 
 
 def load_garbage_frames():
-    """Загружает кадры мусора."""
-    frames = []
-    for path in GARBAGE_FILES:
-        with open(path, 'r', encoding='utf-8') as fh:
-            frames.append(fh.read())
-    return frames
+    """Загружает кадры мусора в виде спрайтов."""
+    return [load_sprite(path) for path in GARBAGE_FILES]
 
 
 async def sleep(tics=1):
-    """Задержка на указанное количество тиков."""
+    """Задержка на указанное количество тиков игровых часов."""
     if tics <= 0:
         return
-    await asyncio.sleep(tics * TIC_TIMEOUT)
+    await clock.sleep(tics)
 
 
 async def show_gameover(canvas):
     """Отображает экран Game Over в центре."""
-    rows, columns = get_frame_size(GAME_OVER_FRAME)
+    game_over_frame = load_sprite(GAME_OVER_FILE)
+    rows, columns = get_frame_size(game_over_frame)
     max_row, max_column = canvas.getmaxyx()
     start_row = max((max_row - rows) // 2, BORDER_WIDTH)
     start_column = max((max_column - columns) // 2, BORDER_WIDTH)
 
     while True:
-        draw_frame(canvas, start_row, start_column, GAME_OVER_FRAME)
+        draw_frame(canvas, start_row, start_column, game_over_frame)
         await sleep(1)
 
 
@@ -103,31 +142,29 @@ async def update_year():
         year += 1
 
 
-async def show_year_info(canvas):
-    """Показывает текущий год и событие в верхней части экрана."""
-    last_phrase = ''
-    last_phrase_year = None
+async def show_year_info(canvas, scenario):
+    """Показывает текущий год и событие в верхней части экрана.
+
+    Строки пишутся в буфер кадра на каждом выводимом тике: мусор, корабль
+    и взрывы, стирая себя, затирают и их. Неизменные клетки FrameWriter на
+    терминал не отправляет, так что это стоит только записи в буфер.
+    """
+    max_rows, max_columns = canvas.getmaxyx()
+    info_row = min(max_rows - BORDER_WIDTH - 1, BORDER_WIDTH + 1)
+    message_row = min(info_row + 1, max_rows - BORDER_WIDTH - 1)
+    clear_width = max_columns - BORDER_WIDTH * 2
+    shown_year = None
     while True:
-        if year in PHRASES:
-            last_phrase = PHRASES[year]
-            last_phrase_year = year
-        elif last_phrase and last_phrase_year is not None and year - last_phrase_year > 2:
-            last_phrase = ''
-            last_phrase_year = None
-
-        max_rows, max_columns = canvas.getmaxyx()
-        info_row = min(max_rows - BORDER_WIDTH - 1, BORDER_WIDTH + 1)
-        message_row = min(info_row + 1, max_rows - BORDER_WIDTH - 1)
-        clear_width = max_columns - BORDER_WIDTH * 2
-        if clear_width > 0:
-            blank = ' ' * clear_width
+        # Фраза ищется, только когда сменился год
+        if year != shown_year:
+            shown_year = year
+            info = f'Year: {year}'[:clear_width].ljust(clear_width)
+            message = (scenario.phrase(year) or '')[:clear_width].ljust(clear_width)
+
+        if clock.rendering and clear_width > 0:
             try:
-                canvas.addstr(info_row, BORDER_WIDTH, blank)
-                canvas.addstr(info_row, BORDER_WIDTH, f'Year: {year}'[:clear_width])
-                canvas.addstr(message_row, BORDER_WIDTH, blank)
-                if last_phrase:
-                    canvas.addstr(message_row, BORDER_WIDTH, last_phrase[:clear_width])
-                canvas.refresh()
+                canvas.addstr(info_row, BORDER_WIDTH, info)
+                canvas.addstr(message_row, BORDER_WIDTH, message)
             except curses.error:
                 pass
 
@@ -142,249 +179,311 @@ async def show_fire_hint(canvas, max_x):
         await sleep(1)
     try:
         canvas.addstr(BORDER_WIDTH, hint_column, hint_text)
-        canvas.refresh()
     except curses.error:
         pass
 
 
-async def blink(canvas, row, column, symbol='*', offset_tics=0):
-    """Корутина для анимации мерцания звезд."""
-    await sleep(offset_tics)
-
-    while True:
-        canvas.addstr(row, column, symbol, curses.A_DIM)
-        canvas.refresh()
-        await sleep(STAR_DIM_DURATION)
-
-        canvas.addstr(row, column, symbol)
-        canvas.refresh()
-        await sleep(STAR_NORMAL_DURATION)
-
-        canvas.addstr(row, column, symbol, curses.A_BOLD)
-        canvas.refresh()
-        await sleep(STAR_BOLD_DURATION)
-
-        canvas.addstr(row, column, symbol)
-        canvas.refresh()
-        await sleep(STAR_NORMAL_DURATION)
-
-
-async def fly_garbage(canvas, column, garbage_frame, speed=0.5):
-    """Animate garbage falling within the playfield and register obstacle state."""
-    rows_number, columns_number = canvas.getmaxyx()
-    frame_height, frame_width = get_frame_size(garbage_frame)
-
-    max_column = max(BORDER_WIDTH, columns_number - frame_width - BORDER_WIDTH)
-    column = max(column, BORDER_WIDTH)
-    column = min(column, max_column)
+def scatter_stars(stars_count, row_top, row_bottom, max_x):
+    """Разбрасывает звёзды по небу со случайными символами и сдвигами мерцания."""
+    star_field = StarField(STAR_PHASES)
+    for _ in range(stars_count):
+        star_field.add(
+            rng.randint(row_top, row_bottom),
+            rng.randint(BORDER_WIDTH, max_x - BORDER_WIDTH - 1),
+            rng.choice(STAR_SYMBOLS),
+            rng.randint(0, STAR_OFFSET_MAX),
+        )
+    return star_field
 
-    max_row_position = max(rows_number - frame_height - BORDER_WIDTH, BORDER_WIDTH)
 
-    row = 0
-    obstacle = Obstacle(row, column, frame_height, frame_width)
-    obstacles.append(obstacle)
+def retire_garbage(canvas, garbage, slot, garbage_frames):
+    """Стирает кусок мусора с экрана и убирает его из хранилища и реестра препятствий."""
+    if garbage.drawn[slot]:
+        frame = garbage_frames[garbage.sprites[slot]]
+        draw_sprite(canvas, garbage.drawn_rows[slot], garbage.drawn_columns[slot], frame, negative=True)
+    obstacle = garbage.links[slot]
+    garbage.kill(slot)
+    obstacles.discard(obstacle)
+    obstacles_in_last_collisions.discard(obstacle)
+    obstacle_pool.release(obstacle)
 
-    try:
-        while row < max_row_position:
-            obstacle.row = row
-            obstacle.column = column
 
-            draw_frame(canvas, row, column, garbage_frame)
-            await sleep(1)
-            draw_frame(canvas, row, column, garbage_frame, negative=True)
+def launch_garbage(garbage, garbage_frames, spawn):
+    """Выпускает у верхнего края кусок мусора из рассчитанного заранее запуска."""
+    frame = garbage_frames[spawn.sprite]
+    obstacle = obstacles.add(obstacle_pool.acquire(0, spawn.column, frame.rows, frame.columns))
+    garbage.spawn(0, spawn.column, spawn.speed, sprite=spawn.sprite, born=clock.tick, link=obstacle)
 
-            if obstacle not in obstacles or obstacle in obstacles_in_last_collisions:
-                if obstacle in obstacles_in_last_collisions:
-                    obstacles_in_last_collisions.remove(obstacle)
-                break
 
-            row += speed
-    finally:
-        if obstacle in obstacles:
-            obstacles.remove(obstacle)
-        if obstacle in obstacles_in_last_collisions:
-            obstacles_in_last_collisions.remove(obstacle)
+def fly_garbage(canvas, garbage, garbage_frames, rules):
+    """Сдвигает весь мусор на один тик симуляции и убирает сбитый и улетевший."""
+    rows, columns, speeds, sprites, links = garbage.rows, garbage.columns, garbage.row_speeds, garbage.sprites, garbage.links
+    start_rows, born = garbage.start_rows, garbage.born
 
-
-async def fill_orbit_with_garbage(canvas, garbage_frames, garbage_tasks):
-    """Создает бесконечный поток мусора согласно сценарию."""
-    while True:
-        delay = get_garbage_delay_tics(year)
-        if delay is None:
-            await sleep(1)
+    for slot in garbage.slots():
+        obstacle = links[slot]
+        if obstacle not in obstacles or obstacle in obstacles_in_last_collisions:
+            retire_garbage(canvas, garbage, slot, garbage_frames)
             continue
 
-        frame = random.choice(garbage_frames)
-        _, columns = canvas.getmaxyx()
-        _, frame_width = get_frame_size(frame)
-        max_column = max(columns - frame_width - BORDER_WIDTH, BORDER_WIDTH)
-        column = random.randint(BORDER_WIDTH, max_column)
-        speed = random.uniform(*GARBAGE_SPEED_RANGE)
-        task = asyncio.create_task(
-            fly_garbage(canvas, column, frame, speed)
-        )
-        garbage_tasks.add(task)
-        task.add_done_callback(lambda task: garbage_tasks.discard(task))
-        await sleep(delay)
+        row = flown(start_rows[slot], speeds[slot], clock.tick - born[slot])
+        if row >= garbage_bottom(rules, garbage_frames[sprites[slot]].rows):
+            retire_garbage(canvas, garbage, slot, garbage_frames)
+            continue
 
+        rows[slot] = row
+        obstacles.move(obstacle, row, columns[slot])
 
-async def fire(canvas, start_row, start_column, rows_speed=FIRE_SPEED, columns_speed=0):
-    """Корутина для анимации выстрела."""
-    row, column = start_row, start_column
-    max_row, max_column = canvas.getmaxyx()
-    max_row -= BORDER_WIDTH
-    max_column -= BORDER_WIDTH
 
-    canvas.addstr(round(row), round(column), '*')
-    canvas.refresh()
-    await sleep(FIRE_FLASH_DURATION)
+def draw_garbage(canvas, garbage, garbage_frames):
+    """Перерисовывает мусор: сначала стирает весь со старых мест, потом рисует на новых."""
+    slots = garbage.slots()
+    rows, columns, sprites = garbage.rows, garbage.columns, garbage.sprites
+    drawn, drawn_rows, drawn_columns = garbage.drawn, garbage.drawn_rows, garbage.drawn_columns
 
-    canvas.addstr(round(row), round(column), 'O')
-    canvas.refresh()
-    await sleep(FIRE_FLASH_DURATION)
+    for slot in slots:
+        if drawn[slot]:
+            draw_sprite(canvas, drawn_rows[slot], drawn_columns[slot], garbage_frames[sprites[slot]], negative=True)
+    for slot in slots:
+        draw_sprite(canvas, rows[slot], columns[slot], garbage_frames[sprites[slot]])
+        drawn[slot] = 1
+        drawn_rows[slot], drawn_columns[slot] = rows[slot], columns[slot]
 
-    canvas.addstr(round(row), round(column), ' ')
-    canvas.refresh()
 
-    symbol = '-' if columns_speed else '|'
-    curses.beep()
+async def fill_orbit_with_garbage(canvas, garbage_frames, garbage, schedule, rules):
+    """Система мусора: раз в тик двигает весь мусор и выпускает новый по расписанию schedule.
 
-    while BORDER_WIDTH <= row < max_row and BORDER_WIDTH <= column < max_column:
-        row_int = round(row)
-        col_int = round(column)
+    Рисует только на тиках, кадр которых попадёт на экран.
+    """
+    while True:
+        fly_garbage(canvas, garbage, garbage_frames, rules)
 
-        hit_obstacle = None
-        for obstacle in tuple(obstacles):
-            if obstacle.has_collision(row_int, col_int):
-                hit_obstacle = obstacle
-                break
+        for spawn in schedule.pop_due(clock.tick):
+            launch_garbage(garbage, garbage_frames, spawn)
 
-        if hit_obstacle is not None:
-            if hit_obstacle not in obstacles_in_last_collisions:
-                obstacles_in_last_collisions.append(hit_obstacle)
+        if clock.rendering:
+            draw_garbage(canvas, garbage, garbage_frames)
 
-            await explode(canvas, row_int, col_int)
+        await sleep(1)
 
-            if hit_obstacle in obstacles:
-                obstacles.remove(hit_obstacle)
-            if hit_obstacle in obstacles_in_last_collisions:
-                obstacles_in_last_collisions.remove(hit_obstacle)
-            return
 
-        canvas.addstr(row_int, col_int, symbol)
-        canvas.refresh()
-        await sleep(FIRE_MOVE_DURATION)
+def fire(bullets, start_row, start_column, rows_speed=FIRE_SPEED, columns_speed=0):
+    """Выпускает снаряд: дальше его ведёт и рисует система снарядов."""
+    bullets.spawn(start_row, start_column, rows_speed, columns_speed, born=clock.tick)
+
+
+def retire_bullet(canvas, bullets, slot):
+    """Стирает снаряд с экрана и освобождает его слот."""
+    if bullets.drawn[slot]:
+        canvas.addstr(round(bullets.drawn_rows[slot]), round(bullets.drawn_columns[slot]), ' ')
+    bullets.kill(slot)
+
+
+def draw_bullets(canvas, bullets):
+    """Перерисовывает снаряды: вспышку при выстреле, затем след полёта."""
+    slots = bullets.slots()
+    rows, columns, column_speeds, born = bullets.rows, bullets.columns, bullets.column_speeds, bullets.born
+    drawn, drawn_rows, drawn_columns = bullets.drawn, bullets.drawn_rows, bullets.drawn_columns
+    flash_end = FIRE_FLASH_DURATION * 2
+
+    for slot in slots:
+        if drawn[slot]:
+            canvas.addstr(round(drawn_rows[slot]), round(drawn_columns[slot]), ' ')
+    for slot in slots:
+        age = clock.tick - born[slot]
+        if age < FIRE_FLASH_DURATION:
+            symbol = '*'
+        elif age < flash_end:
+            symbol = 'O'
+        else:
+            symbol = '-' if column_speeds[slot] else '|'
+        canvas.addstr(round(rows[slot]), round(columns[slot]), symbol)
+        drawn[slot] = 1
+        drawn_rows[slot], drawn_columns[slot] = rows[slot], columns[slot]
+
+
+async def fly_bullets(canvas, bullets, effects, rules):
+    """Система снарядов: раз в тик ведёт все выпущенные снаряды и рисует их на выводимых кадрах."""
+    rows, columns, row_speeds, column_speeds, born = (
+        bullets.rows, bullets.columns, bullets.row_speeds, bullets.column_speeds, bullets.born
+    )
+    start_rows, start_columns = bullets.start_rows, bullets.start_columns
 
-        canvas.addstr(row_int, col_int, ' ')
-        row += rows_speed
-        column += columns_speed
+    while True:
+        # Слоты переиспользуются: снаряды проверяются по старшинству, как в World, — кому достанется мусор,
+        # если два снаряда задели его на одном тике, от номеров слотов не зависит
+        for slot in sorted(bullets.slots(), key=born.__getitem__):
+            age = clock.tick - born[slot]
+            if not bullet_checked(rules, age):
+                continue
+
+            moves = bullet_moves(rules, age)
+            if moves == 0:
+                canvas.beep()
+            row = rows[slot] = flown(start_rows[slot], row_speeds[slot], moves)
+            column = columns[slot] = flown(start_columns[slot], column_speeds[slot], moves)
+
+            if not bullet_in_field(rules, row, column):
+                retire_bullet(canvas, bullets, slot)
+                continue
+
+            row_int = round(row)
+            col_int = round(column)
+            # Задевший несколько кусков мусора снаряд сбивает запущенный раньше всех, как в World
+            hit_obstacle = obstacles.oldest_collision(row_int, col_int)
+            if hit_obstacle is not None:
+                # Сбитый мусор перестаёт сталкиваться сразу, а стирает его система мусора
+                obstacles.discard(hit_obstacle)
+                obstacles_in_last_collisions.add(hit_obstacle)
+                retire_bullet(canvas, bullets, slot)
+                explode(canvas, effects, row_int, col_int)
+
+        if clock.rendering:
+            draw_bullets(canvas, bullets)
 
+        await sleep(1)
 
 
-async def run_spaceship(canvas, rocket_frames, max_y, max_x, fire_tasks):
-    """Корутина для анимации корабля."""
-    spaceship_row = max_y / CENTER_DIVISOR
-    spaceship_column = max_x / CENTER_DIVISOR
-    row_speed = 0.0
-    column_speed = 0.0
+async def run_spaceship(canvas, rocket_frames, ship, rules, bullets, controls):
+    """Корутина для анимации корабля: раз в тик забирает накопленные нажатия из controls.
 
-    frame_iterator = itertools.cycle(rocket_frames)
-    current_frame = next(frame_iterator)
-    frame_height, frame_width = get_frame_size(current_frame)
-    frame_counter = 0
+    Состояние корабля лежит в ship (world.Ship), а шаг делает ship.move() —
+    тот же, которым автопилот предсказывает будущее.
+    """
+    global crash_tick
+    ship.clamp(rules)
+    drawn = (round(ship.row), round(ship.column), rocket_frames[ship.frame])
+    draw_frame(canvas, *drawn)
 
-    min_row = BORDER_WIDTH
-    min_column = BORDER_WIDTH
-    max_row_position = max(min_row, max_y - frame_height - BORDER_WIDTH)
-    max_column_position = max(min_column, max_x - frame_width - BORDER_WIDTH)
-    spaceship_row = min(max(spaceship_row, min_row), max_row_position)
-    spaceship_column = min(max(spaceship_column, min_column), max_column_position)
+    while True:
+        rows_direction, columns_direction, space_pressed = controls.read()
+        ship.move(rules, rows_direction, columns_direction)
 
-    draw_frame(canvas, round(spaceship_row), round(spaceship_column), current_frame)
-    canvas.refresh()
+        ship_row_int = round(ship.row)
+        ship_col_int = round(ship.column)
+        current_frame = rocket_frames[ship.frame]
+        frame_height, frame_width = rules.ship_sizes[ship.frame]
+        if clock.rendering:
+            draw_frame(canvas, *drawn, negative=True)
+            drawn = (ship_row_int, ship_col_int, current_frame)
+            draw_frame(canvas, *drawn)
 
-    while True:
-        rows_direction, columns_direction, space_pressed = read_controls(canvas)
-
-        draw_frame(canvas, round(spaceship_row), round(spaceship_column), current_frame, negative=True)
-
-        row_speed, column_speed = update_speed(row_speed, column_speed, rows_direction, columns_direction)
-
-        next_row = spaceship_row + row_speed
-        next_column = spaceship_column + column_speed
-
-        min_row = BORDER_WIDTH
-        min_column = BORDER_WIDTH
-        max_row_position = max_y - frame_height - BORDER_WIDTH
-        max_column_position = max_x - frame_width - BORDER_WIDTH
-        max_row_position = max(min_row, max_row_position)
-        max_column_position = max(min_column, max_column_position)
-
-        if next_row < min_row:
-            next_row = min_row
-            row_speed = 0
-        elif next_row > max_row_position:
-            next_row = max_row_position
-            row_speed = 0
-
-        if next_column < min_column:
-            next_column = min_column
-            column_speed = 0
-        elif next_column > max_column_position:
-            next_column = max_column_position
-            column_speed = 0
-
-        spaceship_row, spaceship_column = next_row, next_column
-
-        frame_counter += 1
-        if frame_counter >= FRAME_SWITCH_INTERVAL:
-            current_frame = next(frame_iterator)
-            frame_height, frame_width = get_frame_size(current_frame)
-            frame_counter = 0
-
-            max_row_position = max_y - frame_height - BORDER_WIDTH
-            max_column_position = max_x - frame_width - BORDER_WIDTH
-            max_row_position = max(min_row, max_row_position)
-            max_column_position = max(min_column, max_column_position)
-            spaceship_row = min(max(spaceship_row, min_row), max_row_position)
-            spaceship_column = min(max(spaceship_column, min_column), max_column_position)
-
-        draw_frame(canvas, round(spaceship_row), round(spaceship_column), current_frame)
-        canvas.refresh()
-
-        ship_row_int = round(spaceship_row)
-        ship_col_int = round(spaceship_column)
-        hit_obstacle = None
-        for obstacle in tuple(obstacles):
-            if obstacle.has_collision(ship_row_int, ship_col_int, frame_height, frame_width):
-                hit_obstacle = obstacle
-                break
+        hit_obstacle = obstacles.find_collision(ship_row_int, ship_col_int, frame_height, frame_width)
 
         if hit_obstacle is not None:
-            draw_frame(canvas, ship_row_int, ship_col_int, current_frame, negative=True)
-            canvas.refresh()
-            for task in tuple(fire_tasks):
-                task.cancel()
+            crash_tick = clock.tick
+            draw_frame(canvas, *drawn, negative=True)
+            for slot in bullets.slots():
+                retire_bullet(canvas, bullets, slot)
             asyncio.create_task(show_gameover(canvas))
             return
 
-        if space_pressed and year >= FIRE_UNLOCK_YEAR:
-            fire_row = max(round(spaceship_row) - 1, BORDER_WIDTH)
-            fire_column = round(spaceship_column) + frame_width // 2
-            fire_column = max(fire_column, BORDER_WIDTH)
-            fire_column = min(fire_column, max_x - BORDER_WIDTH)
-            fire_task = asyncio.create_task(
-                fire(canvas, fire_row, fire_column)
-            )
-            fire_tasks.add(fire_task)
-            fire_task.add_done_callback(lambda task: fire_tasks.discard(task))
+        if space_pressed and fire_unlocked(rules, clock.tick):
+            fire_row, fire_column = fire_origin(rules, ship_row_int, ship_col_int, frame_width)
+            fire(bullets, fire_row, fire_column, rules.fire_speed)
 
         await sleep(1)
 
 
-async def draw(canvas):
-    curses.curs_set(False)
-    canvas.nodelay(True)
+def reset_game_state(seed=None):
+    """Сбрасывает глобальное состояние перед новой игрой в том же процессе."""
+    global year, crash_tick
+    year = YEAR_START
+    crash_tick = None
+    rng.seed(seed)
+    # Препятствия прошлой игры возвращаются в пул, а не бросаются; сбитые на
+    # последнем тике уже не в реестре, но мусор ещё не успел их вернуть
+    for obstacle in obstacles:
+        obstacle_pool.release(obstacle)
+    for obstacle in obstacles_in_last_collisions:
+        obstacle_pool.release(obstacle)
+    obstacles.clear()
+    obstacles_in_last_collisions.clear()
+    clock.reset()
+
+
+def capture_world(world, ship, garbage, bullets, schedule):
+    """Перенести состояние игры в world перед ходом корабля на текущем тике."""
+    world.reset(clock.tick, ship.state(), schedule.peek())
+    # Миру нужны точки и тики запуска: положение на любом тике он считает сам, как и игра
+    start_rows, start_columns, speeds, sprites, born, links = (
+        garbage.start_rows, garbage.start_columns, garbage.row_speeds, garbage.sprites, garbage.born, garbage.links,
+    )
+    for slot in garbage.slots():
+        obstacle = links[slot]
+        # Сбитый мусор ещё в хранилище до следующего тика, но уже ни с чем не сталкивается
+        if obstacle in obstacles and obstacle not in obstacles_in_last_collisions:
+            world.add_garbage(start_rows[slot], start_columns[slot], speeds[slot], sprites[slot], born[slot])
+    for slot in bullets.slots():
+        world.add_bullet(bullets.start_rows[slot], bullets.start_columns[slot], bullets.born[slot])
+
+def year_at(tick):
+    """Игровой год на тике tick."""
+    return YEAR_START + tick // YEAR_TICS
+
+
+def game_digest(ship, garbage, bullets):
+    """Отпечаток состояния мира: год, тик, корабль, авария, мусор и снаряды с их координатами."""
+    state = [clock.tick, year, ship.state(), crash_tick]
+    for store in (garbage, bullets):
+        state.append([
+            (slot, store.rows[slot], store.columns[slot], store.sprites[slot])
+            for slot in store.slots()
+        ])
+    return hashlib.sha1(repr(state).encode()).hexdigest()
+
+
+async def warp_to_fire_era(warp):
+    """Ускоряет время в warp раз, пока не наступит эра плазменной пушки."""
+    clock.warp = warp
+    while year < FIRE_UNLOCK_YEAR:
+        await sleep(1)
+    clock.warp = 1
+
+
+async def draw(
+    window, years=None, virtual_time=False, hud=False, metrics_path=None, render_fps=RENDER_FPS, warp=1,
+    ticks=None, seed=None, recorder=None, scenario=default_scenario, star_density=None, backend='curses',
+    threaded_output=False, governed=False, bandwidth=None, governor_log_path=None, until_crash=False,
+    autopilot=False, trace_path=None, parity=None,
+):
+    """Запускает игру в окне window и возвращает буфер кадра после её окончания.
+
+    years ограничивает игру числом игровых лет, virtual_time прогоняет тики
+    без ожидания — так игру можно запускать без терминала и быстрее реального времени.
+    hud включает строку счётчиков производительности, metrics_path — их запись
+    в файл JSON lines по строке на тик.
+
+    Симуляция всегда идёт с шагом TIC_TIMEOUT, а экран выводится с частотой
+    render_fps кадров в секунду. warp больше 1 прогоняет столько тиков
+    симуляции на каждый шаг часов, пока не наступит FIRE_UNLOCK_YEAR.
+
+    ticks ограничивает игру числом тиков вместо лет. seed задаёт сид
+    генератора игры, а recorder (replay.SessionRecorder) записывает сессию:
+    размер окна, нажатия по тикам и отпечаток мира после каждого тика.
+    scenario (game_scenario.Scenario) задаёт события по годам и темп мусора.
+    star_density — доля клеток неба со звёздами вместо STARS_COUNT.
+    backend — имя бэкенда вывода из backends.BACKENDS: 'curses' или 'ansi'.
+    threaded_output выводит кадры на терминал из отдельного потока, чтобы
+    медленный терминал не останавливал симуляцию.
+    governed включает регулятор качества (governor.QualityGovernor): под
+    нагрузкой он сбрасывает детализацию, bandwidth — полоса терминала в
+    байтах в секунду, governor_log_path — файл JSON lines со сменами качества.
+    until_crash заканчивает игру, как только корабль разбился (тик — в crash_tick).
+    autopilot отдаёт управление кораблём autopilot.Autopilot вместо клавиатуры.
+    trace_path — файл трассы Chrome trace events (tracing.Tracer): шаги
+    каждой задачи, вызовы бэкенда вывода, тики и опоздания таймера.
+    parity (replay.ParityCheck) сверяет на каждом тике игру с world.World,
+    который шагает рядом с тем же вводом.
+    """
+    reset_game_state(seed)
+    window.nodelay(True)
+    # Без трассы задачи и бэкенд ставятся как есть, без обёрток
+    tracer = Tracer(TIC_TIMEOUT) if trace_path else None
+    output = make_backend(backend, window)
+    if tracer is not None:
+        output = TracedBackend(output, tracer)
+    canvas = FrameBuffer(window, output, threaded=threaded_output)
 
     max_y, max_x = canvas.getmaxyx()
     canvas.border()
@@ -392,43 +491,262 @@ async def draw(canvas):
     rocket_frames = load_rocket_frames()
     garbage_frames = load_garbage_frames()
 
-    fire_tasks = set()
-    garbage_tasks = set()
-    tasks = [
-        asyncio.create_task(run_spaceship(canvas, rocket_frames, max_y, max_x, fire_tasks)),
-        asyncio.create_task(fill_orbit_with_garbage(canvas, garbage_frames, garbage_tasks)),
-        asyncio.create_task(update_year()),
-        asyncio.create_task(show_year_info(canvas)),
-    ]
-    tasks.append(asyncio.create_task(show_fire_hint(canvas, max_x)))
-
     info_row = min(max_y - BORDER_WIDTH - 1, BORDER_WIDTH + 1)
     message_row = min(info_row + 1, max_y - BORDER_WIDTH - 1)
     star_row_top = min(message_row + 1, max_y - BORDER_WIDTH - 1)
     star_row_bottom = max_y - BORDER_WIDTH - 1
     star_row_top = min(star_row_top, star_row_bottom)
 
-    for _ in range(STARS_COUNT):
-        star_row = random.randint(star_row_top, star_row_bottom)
-        star_column = random.randint(BORDER_WIDTH, max_x - BORDER_WIDTH - 1)
-        tasks.append(asyncio.create_task(
-            blink(
-                canvas,
-                star_row,
-                star_column,
-                random.choice(STAR_SYMBOLS),
-                random.randint(0, STAR_OFFSET_MAX)
-            )
-        ))
+    rules = Rules(
+        rows=max_y,
+        columns=max_x,
+        border=BORDER_WIDTH,
+        ship_sizes=[get_frame_size(frame) for frame in rocket_frames],
+        garbage_sizes=[(frame.rows, frame.columns) for frame in garbage_frames],
+        fire_speed=scenario.fire_speed if scenario.fire_speed is not None else FIRE_SPEED,
+        # Год сменяется после хода корабля, поэтому пушка оживает на тик позже начала года
+        fire_unlock_tick=(FIRE_UNLOCK_YEAR - YEAR_START) * YEAR_TICS + 1,
+        flash_ticks=FIRE_FLASH_DURATION * 2,
+        move_ticks=FIRE_MOVE_DURATION,
+        frame_switch=FRAME_SWITCH_INTERVAL,
+    )
+    ship = Ship(max_y / CENTER_DIVISOR, max_x / CENTER_DIVISOR)
+
+    controls = Controls(canvas)
+    if not virtual_time:
+        controls.attach(sys.stdin)
+
+    garbage = EntityStore(GARBAGE_POOL_SIZE)
+    bullets = EntityStore(BULLET_POOL_SIZE)
+    effects = Effects(canvas, EFFECT_POOL_SIZE)
+    pools.clear()
+    pools.update(obstacles=obstacle_pool, garbage=garbage, bullets=bullets, effects=effects.pool)
+
+    # Свой генератор у расписания: запуски мусора не зависят от прочего случайного выбора
+    schedule = SpawnSchedule(
+        random.Random(rng.getrandbits(64)),
+        scenario.garbage_delay_tics,
+        year_at,
+        [frame.columns for frame in garbage_frames],
+        max_x,
+        scenario.garbage_speed_range or GARBAGE_SPEED_RANGE,
+        border=BORDER_WIDTH,
+        start_tick=clock.tick,
+    )
+
+    pilot = controls
+    if autopilot:
+        world = World(rules)
+        # В реальном времени перебор не должен съедать тик; в виртуальном он полный и воспроизводимый
+        pilot = Autopilot(
+            world,
+            lambda: capture_world(world, ship, garbage, bullets, schedule),
+            budget=None if virtual_time else TIC_TIMEOUT / 2,
+        )
 
-    await asyncio.gather(*tasks)
+    stars_count = STARS_COUNT
+    if star_density is not None:
+        sky_area = (star_row_bottom - star_row_top + 1) * (max_x - BORDER_WIDTH * 2)
+        stars_count = round(star_density * sky_area)
+    star_field = scatter_stars(stars_count, star_row_top, star_row_bottom, max_x)
+
+    if recorder is not None:
+        recorder.rows, recorder.columns = max_y, max_x
+        recorder.scenario = scenario.to_dict()
+        recorder.fingerprint = lambda: game_digest(ship, garbage, bullets)
+        pilot.history = recorder.input_log
+        clock.listeners.append(recorder.on_tick)
+    if parity is not None:
+        parity.shadow, parity.live = World(rules), World(rules)
+        parity.capture = lambda world: capture_world(world, ship, garbage, bullets, schedule)
+        parity.crashed = lambda: crash_tick is not None
+        pilot.read = parity.watch(pilot.read)
+        clock.listeners.append(parity.on_tick)
+
+    governor = None
+    if governed:
+        governor = QualityGovernor(
+            TIC_TIMEOUT,
+            bytes_total=lambda: canvas.backend.bytes_total or 0,
+            byte_budget=bandwidth * TIC_TIMEOUT if bandwidth else None,
+            log_path=governor_log_path,
+        )
 
-def main(stdscr):
+    metrics = None
+    if hud or metrics_path:
+        gauges = {
+            'fire': lambda: len(bullets),
+            'garbage': lambda: len(garbage),
+            'stars': lambda: len(star_field),
+            'obstacles': lambda: len(obstacles),
+            'effects': lambda: len(effects),
+            'input_ms': lambda: round(controls.latency * 1000, 1),
+        }
+        totals = {
+            'writes': lambda: canvas.writes_total,
+            'refreshes': lambda: canvas.frames,
+            'skipped': lambda: clock.skipped_frames,
+            'dropped': lambda: clock.dropped_ticks,
+            'allocs': lambda: sum(pool.allocations for pool in pools.values()),
+            # curses не сообщает, сколько байт отправил; для него счётчик всегда 0
+            'bytes': lambda: canvas.backend.bytes_total or 0,
+        }
+        if threaded_output:
+            # Кадры в очереди потока вывода и кадры, слитые с более свежими
+            gauges['queue'] = lambda: canvas.writer.queued
+            totals['stale'] = lambda: canvas.writer.dropped_frames
+        if governor is not None:
+            gauges['quality'] = lambda: governor.level
+        if autopilot:
+            gauges['autopilot_ms'] = lambda: round(pilot.search_time * 1000, 1)
+        metrics = TickMetrics(
+            TIC_TIMEOUT,
+            gauges=gauges,
+            totals=totals,
+            path=metrics_path,
+        )
+        clock.listeners.append(metrics.on_tick)
+    if tracer is not None:
+        clock.listeners.append(tracer.on_tick)
+        pilot.read = tracer.traced(f'{type(pilot).__name__}.read', pilot.read)
+    if governor is not None:
+        # Последним: нагрузка тика включает работу остальных слушателей
+        clock.listeners.append(governor.on_tick)
+
+    def render():
+        if hud:
+            metrics.draw_hud(canvas, info_row, BORDER_WIDTH + HUD_OFFSET, max_x - BORDER_WIDTH)
+        canvas.present()
+
+    if tracer is not None:
+        render = tracer.traced('render', render)
+
+    def start(coroutine):
+        return asyncio.create_task(coroutine if tracer is None else tracer.wrap(coroutine))
+
+    if years is not None:
+        ticks = years * YEAR_TICS
+    render_every = max(1, round(1 / (render_fps * TIC_TIMEOUT)))
+    if virtual_time:
+        ticker = start(clock.run_virtual(render=render, ticks=ticks, render_every=render_every))
+    else:
+        ticker = start(clock.run(TIC_TIMEOUT, render=render, ticks=ticks, render_every=render_every))
+
+    # Звёзды — фоновый слой: их система идёт первой, и остальные рисуют поверх
+    star_task = start(star_field.run(canvas))
+    # Системы симуляции — в порядке world.TICK_ORDER, в том же, в каком тик играет World.step()
+    systems = {
+        'ship': lambda: run_spaceship(canvas, rocket_frames, ship, rules, bullets, pilot),
+        'garbage': lambda: fill_orbit_with_garbage(canvas, garbage_frames, garbage, schedule, rules),
+        'bullets': lambda: fly_bullets(canvas, bullets, effects, rules),
+    }
+    system_tasks = {name: start(systems[name]()) for name in TICK_ORDER}
+    ship_task = system_tasks['ship']
+    tasks = [
+        star_task,
+        *system_tasks.values(),
+        start(effects.run()),
+        start(update_year()),
+        start(show_year_info(canvas, scenario)),
+    ]
+    tasks.append(start(show_fire_hint(canvas, max_x)))
+    if warp > 1:
+        tasks.append(start(warp_to_fire_era(warp)))
+
+
+    game = asyncio.gather(*tasks)
+    try:
+        # Корабль заканчивает свою корутину, только когда разбился
+        waited = [ticker, game, ship_task] if until_crash else [ticker, game]
+        done, _ = await asyncio.wait(waited, return_when=asyncio.FIRST_COMPLETED)
+        for future in done:
+            future.result()
+    finally:
+        leftovers = [ticker, game]
+        for task in leftovers:
+            task.cancel()
+        await asyncio.gather(*leftovers, return_exceptions=True)
+        controls.detach()
+        canvas.close()
+        if recorder is not None:
+            clock.listeners.remove(recorder.on_tick)
+        if parity is not None:
+            clock.listeners.remove(parity.on_tick)
+        if metrics is not None:
+            clock.listeners.remove(metrics.on_tick)
+            metrics.close()
+        if governor is not None:
+            clock.listeners.remove(governor.on_tick)
+            governor.close()
+        if tracer is not None:
+            # После canvas.close(): в трассу попадают и кадры, дописанные потоком вывода
+            clock.listeners.remove(tracer.on_tick)
+            tracer.save(trace_path)
+
+    return canvas
+
+
+
+def main(
+    stdscr, hud=False, metrics_path=None, render_fps=RENDER_FPS, warp=1, seed=None, record_path=None,
+    scenario_path=None, star_density=None, backend='curses', threaded_output=False, governed=False,
+    bandwidth=None, governor_log_path=None, autopilot=False, trace_path=None,
+):
     """Основная функция программы."""
     locale.setlocale(locale.LC_ALL, 'en_US.UTF-8')
     curses.use_default_colors()
-    asyncio.run(draw(stdscr))
+    curses.curs_set(False)
+
+    recorder = None
+    if record_path:
+        if seed is None:
+            seed = random.randrange(2 ** 32)
+        recorder = SessionRecorder(seed, warp)
+    scenario = load_scenario(scenario_path) if scenario_path else default_scenario
+    try:
+        asyncio.run(draw(
+            stdscr, hud=hud, metrics_path=metrics_path, render_fps=render_fps, warp=warp,
+            seed=seed, recorder=recorder, scenario=scenario, star_density=star_density, backend=backend,
+            threaded_output=threaded_output, governed=governed, bandwidth=bandwidth,
+            governor_log_path=governor_log_path, autopilot=autopilot, trace_path=trace_path,
+        ))
+    finally:
+        # Сессия обычно заканчивается по Ctrl+C, запись сохраняется и тогда
+        if recorder is not None:
+            recorder.save(record_path)
+
+
+def _positive_float(text):
+    value = float(text)
+    if not value > 0:
+        raise argparse.ArgumentTypeError(f'must be greater than 0, got {text}')
+    return value
 
 
 if __name__ == '__main__':
-    curses.wrapper(main)
+    parser = argparse.ArgumentParser(description='Rocket Power — космическое приключение в терминале.')
+    parser.add_argument('--hud', action='store_true', help='показывать счётчики производительности')
+    parser.add_argument('--metrics', metavar='PATH', help='писать счётчики каждого тика в файл JSON lines')
+    parser.add_argument('--fps', type=_positive_float, default=RENDER_FPS, help='частота вывода кадров, симуляция идёт со своей')
+    parser.add_argument('--warp', type=int, default=1, help=f'во сколько раз ускорить время до {FIRE_UNLOCK_YEAR} года')
+    parser.add_argument('--seed', type=int, help='сид генератора игры')
+    parser.add_argument('--record', metavar='PATH', help='записать сессию для replay.py')
+    parser.add_argument('--scenario', metavar='PATH', help='файл сценария вместо scenarios/default.json')
+    parser.add_argument('--star-density', type=float, help=f'доля клеток неба со звёздами вместо {STARS_COUNT} звёзд')
+    parser.add_argument('--backend', choices=sorted(BACKENDS), default='curses', help='чем выводить кадры на терминал')
+    parser.add_argument('--writer-thread', action='store_true', help='выводить кадры на терминал из отдельного потока')
+    parser.add_argument('--governor', action='store_true', help='сбрасывать детализацию под нагрузкой')
+    parser.add_argument(
+        '--bandwidth', type=float, metavar='BYTES', help='полоса терминала, байт/с, для регулятора (бэкенд ansi)',
+    )
+    parser.add_argument('--autopilot', action='store_true', help='кораблём управляет автопилот')
+    parser.add_argument('--governor-log', metavar='PATH', help='записывать смены качества в файл JSON lines')
+    parser.add_argument('--trace', metavar='PATH', help='записать трассу задач в формате Chrome trace events')
+    args = parser.parse_args()
+    curses.wrapper(
+        main, hud=args.hud, metrics_path=args.metrics, render_fps=args.fps, warp=args.warp,
+        seed=args.seed, record_path=args.record, scenario_path=args.scenario, star_density=args.star_density,
+        backend=args.backend, threaded_output=args.writer_thread,
+        governed=args.governor, bandwidth=args.bandwidth, governor_log_path=args.governor_log,
+        autopilot=args.autopilot, trace_path=args.trace,
+    )
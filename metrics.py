@@ -0,0 +1,77 @@
+import curses
+import json
+import time
+
+from scheduler import clock
+
+
+class TickMetrics:
+    """Счётчики последнего тика для HUD и выгрузки в файл JSON lines.
+
+    gauges — текущие значения (число задач, препятствий), totals —
+    накопительные счётчики, от которых в запись попадает прирост за тик.
+    Оба словаря вида {имя: функция без аргументов}.
+    """
+
+    def __init__(self, tic_timeout, gauges=None, totals=None, path=None):
+        self.tic_timeout = tic_timeout
+        self.gauges = gauges or {}
+        self.totals = totals or {}
+        self.last = {}
+        self._last_totals = {name: counter() for name, counter in self.totals.items()}
+        self._last_tick_end = None
+        self._hud_width = 0
+        self._file = open(path, 'w', encoding='utf-8') if path else None
+
+    def on_tick(self, tick):
+        """Слушатель игровых часов: собрать запись о только что закончившемся тике."""
+        now = time.perf_counter()
+        period = now - self._last_tick_end if self._last_tick_end is not None else 0.0
+        self._last_tick_end = now
+
+        record = {
+            'tick': tick,
+            'time': time.time(),
+            'period_ms': round(period * 1000, 3),
+            'work_ms': round((now - clock.tick_started_at) * 1000, 3),
+            'lag_ms': round(clock.lag * 1000, 3),
+        }
+        for name, gauge in self.gauges.items():
+            record[name] = gauge()
+        for name, counter in self.totals.items():
+            value = counter()
+            record[name] = value - self._last_totals[name]
+            self._last_totals[name] = value
+
+        self.last = record
+        if self._file is not None:
+            self._file.write(json.dumps(record) + '\n')
+
+    def hud_text(self):
+        record = self.last
+        if not record:
+            return ''
+        parts = [
+            f'tick {record["period_ms"]:5.1f}/{self.tic_timeout * 1000:.0f}ms',
+            f'work {record["work_ms"]:4.1f}ms',
+            f'lag {record["lag_ms"]:4.1f}ms',
+        ]
+        parts.extend(f'{name} {record[name]}' for name in (*self.gauges, *self.totals))
+        return ' | '.join(parts)
+
+    def draw_hud(self, canvas, row, left_column, right_column):
+        """Нарисовать строку счётчиков между колонками, прижав её к правому краю."""
+        # Строка выравнивается по самой длинной, чтобы укороченная не оставляла хвост
+        text = self.hud_text()
+        self._hud_width = max(self._hud_width, len(text))
+        text = text.rjust(self._hud_width)[:max(right_column - left_column, 0)]
+        column = right_column - len(text)
+        try:
+            canvas.addstr(row, column, text, curses.A_DIM)
+        except curses.error:
+            pass
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
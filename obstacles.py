@@ -0,0 +1,135 @@
+import itertools
+import math
+
+
+class Obstacle:
+
+    __slots__ = ('row', 'column', 'rows_size', 'columns_size', 'uid')
+
+    def __init__(self, row=0, column=0, rows_size=1, columns_size=1, uid=None):
+        self.reset(row, column, rows_size, columns_size, uid)
+
+    def reset(self, row, column, rows_size=1, columns_size=1, uid=None):
+        """Заполнить препятствие заново: так его можно взять из пула вместо создания нового."""
+        self.row = row
+        self.column = column
+        self.rows_size = rows_size
+        self.columns_size = columns_size
+        self.uid = uid
+
+    def has_collision(self, obj_corner_row, obj_corner_column, obj_size_rows=1, obj_size_columns=1):
+        """Determine if collision has occured. Return True or False."""
+        return overlaps(
+            self.row, self.column, self.rows_size, self.columns_size,
+            obj_corner_row, obj_corner_column, obj_size_rows, obj_size_columns,
+        )
+
+
+def overlaps(row, column, rows, columns, other_row, other_column, other_rows, other_columns):
+    """Пересекаются ли два прямоугольника: по нему сталкиваются и препятствия игры, и мир предсказаний."""
+    return (
+        row < other_row + other_rows and other_row < row + rows
+        and column < other_column + other_columns and other_column < column + columns
+    )
+
+
+class ObstacleRegistry:
+    """Реестр препятствий по uid с пространственным индексом по строкам поля.
+
+    Препятствие лежит в корзинах всех целых строк, которые может задевать,
+    и перекладывается только когда меняется целая часть его строки.
+    Запрос проверяет лишь корзины строк, которые покрывает объект.
+    """
+
+    def __init__(self):
+        self._by_uid = {}
+        self._buckets = {}
+        self._bucket_rows = {}
+        self._uids = itertools.count()
+
+    def __len__(self):
+        return len(self._by_uid)
+
+    def __iter__(self):
+        return iter(tuple(self._by_uid.values()))
+
+    def __contains__(self, obstacle):
+        return self._by_uid.get(obstacle.uid) is obstacle
+
+    def add(self, obstacle):
+        """Зарегистрировать препятствие, выдав ему uid при необходимости."""
+        if obstacle.uid is None:
+            obstacle.uid = next(self._uids)
+        self._by_uid[obstacle.uid] = obstacle
+        self._bucket(obstacle)
+        return obstacle
+
+    def discard(self, obstacle):
+        """Убрать препятствие, если оно ещё зарегистрировано."""
+        if self._by_uid.get(obstacle.uid) is not obstacle:
+            return
+        del self._by_uid[obstacle.uid]
+        self._unbucket(obstacle)
+
+    def move(self, obstacle, row, column):
+        """Сдвинуть препятствие, перекладывая его по корзинам только при смене целой строки."""
+        obstacle.row = row
+        obstacle.column = column
+        if obstacle not in self:
+            return
+        if self._bucket_rows[obstacle.uid] != math.floor(row):
+            self._unbucket(obstacle)
+            self._bucket(obstacle)
+
+    def find_collision(self, row, column, rows_size=1, columns_size=1):
+        """Вернуть первое препятствие, пересекающееся с прямоугольником объекта, или None."""
+        buckets = self._buckets
+        for bucket_row in range(math.floor(row), math.ceil(row + rows_size)):
+            bucket = buckets.get(bucket_row)
+            if not bucket:
+                continue
+            for obstacle in bucket.values():
+                if obstacle.has_collision(row, column, rows_size, columns_size):
+                    return obstacle
+        return None
+
+    def oldest_collision(self, row, column, rows_size=1, columns_size=1):
+        """Из препятствий, пересекающихся с прямоугольником объекта, вернуть зарегистрированное раньше всех.
+
+        Порядок внутри корзин зависит от перекладываний, а ответ от него — нет.
+        Это дороже find_collision: смотреть приходится все препятствия корзин.
+        """
+        buckets = self._buckets
+        found = None
+        for bucket_row in range(math.floor(row), math.ceil(row + rows_size)):
+            bucket = buckets.get(bucket_row)
+            if not bucket:
+                continue
+            for obstacle in bucket.values():
+                if (found is None or obstacle.uid < found.uid) and obstacle.has_collision(
+                    row, column, rows_size, columns_size,
+                ):
+                    found = obstacle
+        return found
+
+    def clear(self):
+        self._by_uid.clear()
+        self._buckets.clear()
+        self._bucket_rows.clear()
+
+    def _bucket(self, obstacle):
+        # floor(row)..floor(row) + rows_size покрывает все целые строки дробного прямоугольника
+        first_row = math.floor(obstacle.row)
+        self._bucket_rows[obstacle.uid] = first_row
+        for bucket_row in range(first_row, first_row + obstacle.rows_size + 1):
+            self._buckets.setdefault(bucket_row, {})[obstacle.uid] = obstacle
+
+    def _unbucket(self, obstacle):
+        first_row = self._bucket_rows.pop(obstacle.uid)
+        for bucket_row in range(first_row, first_row + obstacle.rows_size + 1):
+            bucket = self._buckets.get(bucket_row)
+            if bucket is None:
+                continue
+            bucket.pop(obstacle.uid, None)
+            if not bucket:
+                del self._buckets[bucket_row]
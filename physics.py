@@ -1,5 +1,11 @@
 import math
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
 def _limit(value, min_value, max_value):
     """Limit value by min_value and max_value."""
 
@@ -64,3 +70,121 @@ def update_speed(row_speed, column_speed, rows_direction, columns_direction, row
         column_speed = _apply_acceleration(column_speed, column_speed_limit, columns_direction > 0)
 
     return row_speed, column_speed
+
+
+class AccelerationTable:
+    """Precomputed acceleration deltas for speed fractions in [-1, 1], linearly interpolated.
+
+    Replaces math.cos in batch updates. With the default 1024 steps the error
+    against the exact delta stays below 1e-6.
+    """
+
+    def __init__(self, steps=1024):
+        self.steps = steps
+        self._scale = steps / 2
+        self.deltas = [math.cos(-1 + 2 * index / steps) * 0.75 for index in range(steps + 1)]
+        self._numpy_deltas = numpy.array(self.deltas) if numpy is not None else None
+
+    def delta(self, speed_fraction):
+        if not -1 <= speed_fraction <= 1:
+            return math.cos(speed_fraction) * 0.75
+        position = (speed_fraction + 1) * self._scale
+        index = min(int(position), self.steps - 1)
+        weight = position - index
+        deltas = self.deltas
+        return deltas[index] + (deltas[index + 1] - deltas[index]) * weight
+
+    def delta_array(self, speed_fractions):
+        """Vectorized delta() for NumPy arrays."""
+        inside = numpy.abs(speed_fractions) <= 1
+        positions = (numpy.clip(speed_fractions, -1, 1) + 1) * self._scale
+        indexes = numpy.minimum(positions.astype(numpy.intp), self.steps - 1)
+        weights = positions - indexes
+        deltas = self._numpy_deltas
+        interpolated = deltas[indexes] + (deltas[indexes + 1] - deltas[indexes]) * weights
+        return numpy.where(inside, interpolated, numpy.cos(speed_fractions) * 0.75)
+
+
+def _check_directions(directions, name):
+    if numpy is not None and isinstance(directions, numpy.ndarray):
+        if directions.size and numpy.abs(directions).max() > 1:
+            raise ValueError(f'Wrong {name} values. Expects -1, 0 or 1.')
+        return
+    if not set(directions) <= {-1, 0, 1}:
+        raise ValueError(f'Wrong {name} values. Expects -1, 0 or 1.')
+
+
+def _accelerate_array(speeds, speed_limit, directions, table):
+    speed_limit = abs(speed_limit)
+    if speed_limit:
+        speed_fractions = speeds / speed_limit
+    else:
+        speed_fractions = numpy.zeros_like(speeds)
+
+    if table is None:
+        deltas = numpy.cos(speed_fractions) * 0.75
+    else:
+        deltas = table.delta_array(speed_fractions)
+
+    result = numpy.where(directions > 0, speeds + deltas, speeds - deltas)
+    result = numpy.clip(result, -speed_limit, speed_limit)
+    result[numpy.abs(result) < 0.1] = 0
+    return numpy.where(directions != 0, result, speeds)
+
+
+def update_speeds(row_speeds, column_speeds, rows_directions, columns_directions, row_speed_limit=2, column_speed_limit=2, fading=0.8, table=None):
+    """Batch version of update_speed: update speeds of many bodies in place and return them.
+
+    Speeds are mutable sequences of floats (list, array('d') or NumPy array),
+    directions are sequences of -1, 0 and 1 of the same length (ValueError
+    otherwise, so no body is silently left out of the batch). NumPy arrays
+    are updated with vectorized operations, anything else with a plain loop.
+    table — optional AccelerationTable to avoid calling math.cos for every body.
+    Arguments are checked once per batch, results match update_speed.
+    """
+
+    _check_directions(rows_directions, 'rows_directions')
+    _check_directions(columns_directions, 'columns_directions')
+
+    bodies = len(row_speeds)
+    if not bodies == len(column_speeds) == len(rows_directions) == len(columns_directions):
+        raise ValueError(
+            f'Wrong batch sizes: {bodies} row_speeds, {len(column_speeds)} column_speeds, '
+            f'{len(rows_directions)} rows_directions, {len(columns_directions)} columns_directions. '
+            'Expects sequences of the same length.'
+        )
+
+    if not 0 <= fading <= 1:
+        raise ValueError(f'Wrong fading value {fading}. Expects float between 0 and 1.')
+
+    if numpy is not None and isinstance(row_speeds, numpy.ndarray) and isinstance(column_speeds, numpy.ndarray):
+        row_speeds *= fading
+        column_speeds *= fading
+        row_speeds[:] = _accelerate_array(row_speeds, row_speed_limit, numpy.asarray(rows_directions), table)
+        column_speeds[:] = _accelerate_array(column_speeds, column_speed_limit, numpy.asarray(columns_directions), table)
+        return row_speeds, column_speeds
+
+    for speeds, directions, speed_limit in (
+        (row_speeds, rows_directions, abs(row_speed_limit)),
+        (column_speeds, columns_directions, abs(column_speed_limit)),
+    ):
+        delta_for = table.delta if table is not None else None
+        for index, direction in enumerate(directions):
+            speed = speeds[index] * fading
+            if direction:
+                speed_fraction = speed / speed_limit if speed_limit else 0
+                if delta_for is None:
+                    delta = math.cos(speed_fraction) * 0.75
+                else:
+                    delta = delta_for(speed_fraction)
+
+                speed = speed + delta if direction > 0 else speed - delta
+                if speed < -speed_limit:
+                    speed = -speed_limit
+                elif speed > speed_limit:
+                    speed = speed_limit
+                if abs(speed) < 0.1:
+                    speed = 0
+            speeds[index] = speed
+
+    return row_speeds, column_speeds
@@ -0,0 +1,47 @@
+class Pool:
+    """Пул переиспользуемых записей: вместо нового объекта выдаётся сброшенный старый.
+
+    factory создаёт пустую запись, у записи должен быть метод reset(...),
+    которым acquire() заполняет её заново. Пул сразу создаёт capacity
+    записей; если их не хватает, создаёт ещё и запоминает это в
+    allocations — в установившемся режиме этот счётчик не растёт.
+    """
+
+    def __init__(self, factory, capacity):
+        self.factory = factory
+        self.capacity = capacity
+        self._free = [factory() for _ in range(capacity)]
+        # Сколько записей создано за всё время, сколько выдано сейчас и больше всего за раз
+        self.allocations = capacity
+        self.in_use = 0
+        self.peak = 0
+
+    def __len__(self):
+        return self.in_use
+
+    def acquire(self, *args, **kwargs):
+        """Выдать запись, заполненную через reset(*args, **kwargs)."""
+        if self._free:
+            record = self._free.pop()
+        else:
+            record = self.factory()
+            self.allocations += 1
+            self.capacity += 1
+        record.reset(*args, **kwargs)
+        self.in_use += 1
+        if self.in_use > self.peak:
+            self.peak = self.in_use
+        return record
+
+    def release(self, record):
+        """Вернуть запись в пул; дальше ею пользоваться нельзя."""
+        self.in_use -= 1
+        self._free.append(record)
+
+    def stats(self):
+        return {
+            'capacity': self.capacity,
+            'in_use': self.in_use,
+            'peak': self.peak,
+            'allocations': self.allocations,
+        }
@@ -0,0 +1,201 @@
+import argparse
+import asyncio
+import cProfile
+import json
+import pstats
+import sys
+import time
+
+from game_scenario import Scenario
+from headless import HeadlessCanvas
+from scheduler import clock
+
+# Версия 3: мусор и снаряды считают положение от точки запуска, строки в отпечатке
+# разошлись с записями версии 2 в последних знаках
+RECORDING_VERSION = 3
+
+
+class SessionRecorder:
+    """Запись сессии: сид генератора, размер окна, сценарий, нажатия по тикам и итог.
+
+    Этого достаточно, чтобы повторить игру тик в тик: весь случайный выбор
+    идёт через генератор игры с записанным сидом, а клавиши подаются на тех
+    же тиках, на которых их забрал корабль. Итог — номер последнего
+    законченного тика и отпечаток состояния мира на нём.
+    """
+
+    def __init__(self, seed, warp=1):
+        self.seed = seed
+        self.warp = warp
+        self.rows = self.columns = None
+        # Сценарий в виде словаря: запись не зависит от файлов сценариев на диске
+        self.scenario = None
+        # {тик: коды клавиш}, только тики, на которых что-то нажали
+        self.input_log = {}
+        self.ticks = 0
+        self.digest = None
+        # Функция без аргументов, отпечаток мира; её подставляет draw()
+        self.fingerprint = None
+
+    def on_tick(self, tick):
+        """Слушатель игровых часов: запомнить итог каждого законченного тика."""
+        self.ticks = tick
+        if self.fingerprint is not None:
+            self.digest = self.fingerprint()
+
+    def to_dict(self):
+        return {
+            'version': RECORDING_VERSION,
+            'seed': self.seed,
+            'rows': self.rows,
+            'columns': self.columns,
+            'warp': self.warp,
+            'scenario': self.scenario,
+            'ticks': self.ticks,
+            'digest': self.digest,
+            'input': [[tick, codes] for tick, codes in sorted(self.input_log.items()) if tick <= self.ticks],
+        }
+
+    def save(self, path):
+        with open(path, 'w', encoding='utf-8') as fh:
+            json.dump(self.to_dict(), fh, separators=(',', ':'))
+
+
+class ParityCheck:
+    """Сверка двух путей симуляции: систем игры в main.py и world.World.
+
+    Мир заполняется из игры один раз, на первом тике, а дальше шагает сам
+    рядом с игрой с тем же вводом, который забрал корабль. После каждого
+    тика состояние игры переносится во второй мир, и оба сравниваются по
+    World.state(): корабль и живые мусор и снаряды. Запуски мусора мир берёт
+    из того же расписания, что и игра. Сверка идёт до аварии корабля: на ней
+    сравнивается, что разбились оба, и на одном тике.
+    """
+
+    def __init__(self):
+        # Их подставляет draw(): два мира и функция, переносящая в мир состояние игры
+        self.shadow = None
+        self.live = None
+        self.capture = None
+        self.crashed = None
+        self.ticks = 0
+        # Первое расхождение: (тик, состояние игры, состояние мира), None — если его нет
+        self.mismatch = None
+        # Ввод ходов корабля, которые мир ещё не сыграл: игра делает первый ход ещё до первого тика часов
+        self._pending = []
+        self._started = False
+        self._done = False
+
+    def watch(self, read):
+        """Обёртка над read() корабля: запоминает ввод хода, а перед первым ходом заполняет мир."""
+        def watched():
+            controls = read()
+            if not self._started:
+                self._started = True
+                self.capture(self.shadow)
+            self._pending.append(controls)
+            return controls
+        return watched
+
+    def on_tick(self, tick):
+        if self._done or not self._pending:
+            return
+        for controls in self._pending:
+            self.shadow.step(*controls)
+        self._pending.clear()
+        self.capture(self.live)
+        # Расписание игры считается наперёд кусками: мир берёт его свежий кусок
+        self.shadow.schedule(self.live.spawns)
+        self.ticks += 1
+        crashed = self.crashed()
+        if crashed or self.shadow.crashed:
+            self._done = True
+            if crashed != self.shadow.crashed:
+                self.mismatch = (tick, f'crashed={crashed}', f'crashed={self.shadow.crashed}')
+            return
+        live, shadow = self.live.state(), self.shadow.state()
+        if live != shadow:
+            self._done = True
+            self.mismatch = (tick, live, shadow)
+
+
+def load_recording(path):
+    with open(path, 'r', encoding='utf-8') as fh:
+        recording = json.load(fh)
+    if recording.get('version') != RECORDING_VERSION:
+        raise ValueError(f'{path}: unsupported recording version {recording.get("version")}')
+    return recording
+
+
+def replay(recording, trace_path=None, parity=None):
+    """Проиграть запись без терминала в виртуальном времени и вернуть запись этого прогона.
+
+    parity (ParityCheck) сверяет по ходу прогона игру с world.World.
+    """
+    import main as game
+
+    keys = {tick: codes for tick, codes in recording['input']}
+    canvas = HeadlessCanvas(recording['rows'], recording['columns'], keys)
+    recorder = SessionRecorder(recording['seed'], recording['warp'])
+    scenario = game.default_scenario
+    if recording.get('scenario') is not None:
+        scenario = Scenario.from_dict(recording['scenario'])
+    asyncio.run(game.draw(
+        canvas,
+        virtual_time=True,
+        ticks=recording['ticks'],
+        warp=recording['warp'],
+        seed=recording['seed'],
+        recorder=recorder,
+        scenario=scenario,
+        trace_path=trace_path,
+        parity=parity,
+    ))
+    return recorder, canvas
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Проиграть записанную сессию (main.py --record) без терминала.')
+    parser.add_argument('recording', help='файл записи')
+    parser.add_argument('--profile', action='store_true', help='снять профиль cProfile с прогона')
+    parser.add_argument('--show', action='store_true', help='напечатать последний кадр')
+    parser.add_argument('--trace', metavar='PATH', help='записать трассу задач в формате Chrome trace events')
+    parser.add_argument(
+        '--parity', action='store_true', help='сверять на каждом тике игру с world.World, который шагает рядом',
+    )
+    args = parser.parse_args()
+
+    recording = load_recording(args.recording)
+    profiler = cProfile.Profile() if args.profile else None
+
+    started_at = time.perf_counter()
+    if profiler is not None:
+        profiler.enable()
+    parity = ParityCheck() if args.parity else None
+    recorder, canvas = replay(recording, args.trace, parity)
+    if profiler is not None:
+        profiler.disable()
+    elapsed = time.perf_counter() - started_at
+
+    if args.show:
+        print(canvas.dump())
+    if profiler is not None:
+        pstats.Stats(profiler).sort_stats('cumulative').print_stats(25)
+    print(f'{clock.tick} ticks in {elapsed:.2f} s ({clock.tick / elapsed:.0f} ticks/s)')
+
+    if parity is not None:
+        if parity.mismatch is not None:
+            tick, live, shadow = parity.mismatch
+            print(f'parity breaks at tick {tick}:\n  game  {live}\n  world {shadow}')
+            sys.exit(1)
+        print(f'parity holds for {parity.ticks} ticks')
+
+    if recorder.ticks != recording['ticks'] or recorder.digest != recording['digest']:
+        print(f'outcome differs: recorded {recording["digest"]} at tick {recording["ticks"]}, '
+              f'replayed {recorder.digest} at tick {recorder.ticks}')
+        sys.exit(1)
+    print(f'outcome matches: {recorder.digest}')
+
+
+if __name__ == '__main__':
+    main()
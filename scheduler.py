@@ -0,0 +1,147 @@
+import asyncio
+import time
+
+# Сколько раз уступить циклу событий, чтобы разбуженные корутины и
+# созданные ими задачи успели сделать свой шаг до отрисовки кадра
+SETTLE_YIELDS = 3
+
+# Сколько опоздавших тиков можно догнать за одно пробуждение часов
+MAX_CATCH_UP_TICKS = 5
+
+
+class TickClock:
+    """Единые игровые часы: корутины ждут «через N тиков», а не свой таймер."""
+
+    def __init__(self):
+        self.tick = 0
+        self._buckets = {}
+        # Время начала текущего тика и опоздание его таймера, в секундах
+        self.tick_started_at = time.perf_counter()
+        self.lag = 0.0
+        # Тики, прогнанные без отрисовки при догонянии, и тики, от которых пришлось отказаться
+        self.skipped_frames = 0
+        self.dropped_ticks = 0
+        # Наблюдатели конца тика: замеры, метрики, отладка
+        self.listeners = []
+        # Сколько тиков симуляции приходится на одно пробуждение часов (ускорение времени)
+        self.warp = 1
+        # Будет ли кадр текущего тика выведен на экран: системы рисуют только тогда
+        self.rendering = True
+        # Во сколько раз реже выводить кадры, чем просит render_every: его поднимает регулятор качества
+        self.render_stride = 1
+
+    def sleep(self, tics=1):
+        """Вернуть future, который завершится через tics тиков."""
+        future = asyncio.get_running_loop().create_future()
+        if tics <= 0:
+            future.set_result(None)
+            return future
+        due_tick = self.tick + tics
+        bucket = self._buckets.get(due_tick)
+        if bucket is None:
+            bucket = self._buckets[due_tick] = []
+        bucket.append(future)
+        return future
+
+    def advance(self):
+        """Сдвинуть часы на один тик и разбудить только тех, чей срок наступил."""
+        self.tick += 1
+        woken = 0
+        for future in self._buckets.pop(self.tick, ()):
+            # Отменённые задачи оставляют в корзине отменённый future
+            if not future.done():
+                future.set_result(None)
+                woken += 1
+        return woken
+
+    def pending(self):
+        """Количество ожидающих пробуждения корутин."""
+        return sum(len(bucket) for bucket in self._buckets.values())
+
+    def reset(self):
+        """Сбросить часы: используется при повторном запуске игры в том же процессе."""
+        for bucket in self._buckets.values():
+            for future in bucket:
+                future.cancel()
+        self._buckets.clear()
+        self.tick = 0
+        self.lag = 0.0
+        self.skipped_frames = 0
+        self.dropped_ticks = 0
+        self.warp = 1
+        self.rendering = True
+        self.render_stride = 1
+
+    async def settle(self):
+        """Дать разбуженным на этом тике корутинам отработать до следующего await."""
+        for _ in range(SETTLE_YIELDS):
+            await asyncio.sleep(0)
+
+    async def run(self, tic_timeout, render=None, ticks=None, render_every=1):
+        """Главный цикл часов с фиксированным шагом: один таймер asyncio на весь процесс.
+
+        Каждое пробуждение привязано к абсолютному сроку start + n * tic_timeout,
+        поэтому время работы тика не растягивает период. За пробуждение
+        выполняется warp тиков симуляции. Опоздавшие пробуждения догоняются
+        лишними шагами без отрисовки, но не больше MAX_CATCH_UP_TICKS за раз —
+        остальное отбрасывается, чтобы одна долгая пауза не раскручивала
+        спираль догоняния.
+
+        render вызывается после последнего тика каждого render_every-го
+        (с учётом render_stride) пробуждения, когда все разбуженные корутины
+        нарисовали свой кадр.
+        ticks ограничивает число тиков, по умолчанию часы идут бесконечно.
+        """
+        loop = asyncio.get_running_loop()
+        stop_tick = None if ticks is None else self.tick + ticks
+        deadline = loop.time()
+        wakes = 0
+        while stop_tick is None or self.tick < stop_tick:
+            deadline += tic_timeout
+            await asyncio.sleep(max(deadline - loop.time(), 0))
+            self.lag = max(loop.time() - deadline, 0.0)
+
+            behind = int(self.lag / tic_timeout)
+            if behind > MAX_CATCH_UP_TICKS:
+                self.dropped_ticks += (behind - MAX_CATCH_UP_TICKS) * self.warp
+                deadline += (behind - MAX_CATCH_UP_TICKS) * tic_timeout
+                behind = MAX_CATCH_UP_TICKS
+
+            for _ in range(behind):
+                await self._wake(None, stop_tick)
+                self.skipped_frames += 1
+                deadline += tic_timeout
+
+            wakes += 1
+            await self._wake(render if wakes % (render_every * self.render_stride) == 0 else None, stop_tick)
+
+    async def run_virtual(self, render=None, ticks=None, render_every=1):
+        """Виртуальное время: тики идут подряд без ожидания, так быстро, как позволяет CPU."""
+        stop_tick = None if ticks is None else self.tick + ticks
+        # Как и в run(), первый тик наступает после того, как стартовали все задачи игры
+        await self.settle()
+        wakes = 0
+        while stop_tick is None or self.tick < stop_tick:
+            wakes += 1
+            await self._wake(render if wakes % (render_every * self.render_stride) == 0 else None, stop_tick)
+
+    async def _wake(self, render, stop_tick):
+        """Одно пробуждение часов: warp тиков симуляции, кадр — только после последнего."""
+        steps = self.warp
+        if stop_tick is not None:
+            steps = min(steps, stop_tick - self.tick)
+        for step in range(steps):
+            await self._step(render if step == steps - 1 else None)
+
+    async def _step(self, render):
+        self.tick_started_at = time.perf_counter()
+        self.rendering = render is not None
+        self.advance()
+        await self.settle()
+        if render is not None:
+            render()
+        for listener in self.listeners:
+            listener(self.tick)
+
+
+clock = TickClock()
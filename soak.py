@@ -0,0 +1,212 @@
+import argparse
+import asyncio
+import gc
+import json
+import sys
+import time
+import tracemalloc
+
+from batch import PILOTS, pilot_keys
+from game_scenario import Scenario, scenario as default_scenario
+from headless import DEFAULT_COLUMNS, DEFAULT_ROWS, HeadlessCanvas
+from scheduler import clock
+
+DEFAULT_YEARS = 500
+# Пауза между запусками мусора, в тиках: 1 — самый частый запуск, который допускает расписание
+DEFAULT_GARBAGE_DELAY = 1
+# Раз в столько тиков снимается tracemalloc и считаются задачи и спящие на часах корутины
+DEFAULT_SAMPLE_TICKS = 300
+# Первые замеры не в счёт: пулы, кэши и пакет кадров дорастают до рабочего размера
+DEFAULT_WARMUP_SAMPLES = 3
+# Насколько память может подрасти за прогон, прежде чем это считается утечкой
+DEFAULT_MEMORY_TOLERANCE = 256 * 1024
+# Сколько мест выделения показать в отчёте об утечке
+TOP_SITES = 15
+
+# Выделения самого tracemalloc и импорта не относятся к игре
+SNAPSHOT_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+    tracemalloc.Filter(False, '<unknown>'),
+)
+
+
+def keeps_rising(values, tolerance=0):
+    """Растёт ли ряд на всём протяжении, а не скачет вокруг одного уровня.
+
+    Ряд делится на трети: рост засчитывается, если даже минимум последней
+    трети больше максимума первой на tolerance. Пила от пулов и очередей
+    так не проходит, а утечка, которая копится тик за тиком, — проходит.
+    """
+    third = len(values) // 3
+    if third == 0:
+        return False
+    return min(values[-third:]) > max(values[:third]) + tolerance
+
+
+class SoakSampler:
+    """Слушатель игровых часов: раз в sample_ticks тиков снимает память, задачи и ожидания часов.
+
+    Тики считаются подряд через все игры прогона — часы сбрасываются в
+    начале каждой. Хранит ряды замеров и два снимка tracemalloc: первый
+    после разогрева (baseline) и последний, — по ним строится отчёт о
+    выросших местах выделения.
+    """
+
+    def __init__(self, sample_ticks, warmup_samples, output=None):
+        self.sample_ticks = sample_ticks
+        self.warmup_samples = warmup_samples
+        self.output = output
+        self.ticks = 0
+        self.samples = []
+        self.baseline = None
+        self.last = None
+
+    def on_tick(self, tick):
+        self.ticks += 1
+        if self.ticks % self.sample_ticks == 0:
+            self.sample()
+
+    def sample(self):
+        # Прошлый снимок сам лежит в памяти: без него замеры не скачут на его размер
+        if self.last is not self.baseline:
+            self.last = None
+        # Мусор в циклах (кадры прошлых игр, корутины) ждёт сборщика: считаем только живое
+        gc.collect()
+        snapshot = tracemalloc.take_snapshot().filter_traces(SNAPSHOT_FILTERS)
+        sample = {
+            'ticks': self.ticks,
+            'time': time.time(),
+            'memory': sum(stat.size for stat in snapshot.statistics('filename')),
+            'peak_memory': tracemalloc.get_traced_memory()[1],
+            'tasks': len(asyncio.all_tasks()),
+            # Ожидания в корзинах часов: отменённая задача оставляет своё до наступления срока
+            'sleepers': clock.pending(),
+        }
+        self.samples.append(sample)
+        if len(self.samples) == self.warmup_samples + 1:
+            self.baseline = snapshot
+        self.last = snapshot
+        if self.output is not None:
+            self.output.write(json.dumps(sample) + '\n')
+            self.output.flush()
+        return sample
+
+    def measured(self):
+        """Замеры после разогрева: первый из них — точка отсчёта."""
+        return self.samples[self.warmup_samples:]
+
+    def growth(self, top=TOP_SITES):
+        """Места выделения, выросшие сильнее всего с точки отсчёта."""
+        if self.baseline is None or self.last is self.baseline:
+            return []
+        return [stat for stat in self.last.compare_to(self.baseline, 'lineno') if stat.size_diff > 0][:top]
+
+
+async def soak(years, rows, columns, seed, pilot, scenario, sampler, restart=False):
+    """Играть в одном цикле событий, пока не пройдёт years игровых лет.
+
+    По умолчанию это одна игра: после аварии корабля мусор летит дальше.
+    С restart каждая игра идёт до аварии, и следующая начинается в том же
+    цикле с нового сида — так проверяется и то, что игра убирает за собой.
+    """
+    import main as game
+
+    total_ticks = years * game.YEAR_TICS
+    games = 0
+    while sampler.ticks < total_ticks:
+        game_seed = seed + games
+        remaining = total_ticks - sampler.ticks
+        canvas = HeadlessCanvas(rows, columns, pilot_keys(pilot, game_seed, remaining))
+        await game.draw(
+            canvas, ticks=remaining, virtual_time=True, seed=game_seed, scenario=scenario, until_crash=restart,
+        )
+        games += 1
+    return games
+
+
+def main():
+    import main as game
+
+    parser = argparse.ArgumentParser(
+        description='Долгий прогон без терминала на самом частом мусоре: ищет рост памяти и утечку задач.',
+    )
+    parser.add_argument('--years', type=int, default=DEFAULT_YEARS, help='сколько игровых лет прогнать всего')
+    parser.add_argument('--rows', type=int, default=DEFAULT_ROWS)
+    parser.add_argument('--columns', type=int, default=DEFAULT_COLUMNS)
+    parser.add_argument('--seed', type=int, default=0, help='сид первой игры, следующие идут подряд')
+    parser.add_argument(
+        '--pilot', default='random', help=f'пилот: {", ".join(PILOTS)} или файл записи main.py --record',
+    )
+    parser.add_argument(
+        '--garbage-delay', type=int, default=DEFAULT_GARBAGE_DELAY, help='пауза между запусками мусора, тиков',
+    )
+    parser.add_argument(
+        '--restart', action='store_true', help='после аварии начинать новую игру в том же процессе',
+    )
+    parser.add_argument('--sample-ticks', type=int, default=DEFAULT_SAMPLE_TICKS, help='тиков между замерами')
+    parser.add_argument(
+        '--warmup', type=int, default=DEFAULT_WARMUP_SAMPLES, help='сколько первых замеров не учитывать',
+    )
+    parser.add_argument(
+        '--memory-tolerance', type=int, default=DEFAULT_MEMORY_TOLERANCE, metavar='BYTES',
+        help='допустимый рост памяти за прогон',
+    )
+    parser.add_argument('--output', help='записывать замеры в файл JSON lines')
+    args = parser.parse_args()
+
+    scenario = Scenario(
+        default_scenario.phrases, [(game.YEAR_START, args.garbage_delay)], default_scenario.phrase_years,
+    )
+    output = open(args.output, 'w', encoding='utf-8') if args.output else None
+    sampler = SoakSampler(args.sample_ticks, args.warmup, output)
+
+    tracemalloc.start()
+    clock.listeners.append(sampler.on_tick)
+    started_at = time.perf_counter()
+    try:
+        games = asyncio.run(soak(
+            args.years, args.rows, args.columns, args.seed, args.pilot, scenario, sampler, args.restart,
+        ))
+    finally:
+        clock.listeners.remove(sampler.on_tick)
+        tracemalloc.stop()
+        if output is not None:
+            output.close()
+    elapsed = time.perf_counter() - started_at
+
+    measured = sampler.measured()
+    print(f'{sampler.ticks} ticks, {games} games in {elapsed:.1f} s, {len(sampler.samples)} samples')
+    if len(measured) < 3:
+        print(f'too few samples after warm-up ({len(measured)}): raise --years or lower --sample-ticks')
+        sys.exit(2)
+
+    memory = [sample['memory'] for sample in measured]
+    tasks = [sample['tasks'] for sample in measured]
+    sleepers = [sample['sleepers'] for sample in measured]
+    print(
+        f'memory {memory[0] / 1024:.0f} KiB -> {memory[-1] / 1024:.0f} KiB, tasks {tasks[0]} -> {tasks[-1]}, '
+        f'clock sleepers {sleepers[0]} -> {sleepers[-1]}'
+    )
+
+    failures = []
+    if keeps_rising(memory, args.memory_tolerance):
+        failures.append('memory keeps growing')
+    if keeps_rising(tasks):
+        failures.append('task count keeps growing')
+    if keeps_rising(sleepers):
+        failures.append('clock sleepers keep growing')
+    if not failures:
+        print('no growth after warm-up')
+        return
+
+    print('LEAK: ' + ', '.join(failures))
+    print(f'top growing allocation sites since sample {args.warmup + 1}:')
+    for stat in sampler.growth():
+        print(f'  {stat}')
+    sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+from array import array
+import curses
+
+from governor import quality
+from scheduler import clock
+
+
+class StarField:
+    """Звёздное небо одним слоем: позиции, символы и сдвиги фаз в массивах вместо корутины на звезду.
+
+    Мерцание периодично: тусклая, обычная, яркая, обычная — phases задаёт
+    длительность каждой фазы в тиках. Звезда загорается на тике своего
+    сдвига, а потом её атрибут на тике t берётся из таблицы по
+    (t - сдвиг) % период. Звёзды заранее разложены по корзинам остатков
+    тика, на которых они меняют атрибут, поэтому тик стоит столько,
+    сколько звёзд на нём меняется, а не сколько их всего.
+    """
+
+    def __init__(self, phases):
+        self.attributes = []
+        for attribute, duration in phases:
+            self.attributes.extend([attribute] * duration)
+        self.period = len(self.attributes)
+        self._change_phases = [
+            phase for phase in range(self.period)
+            if phase == 0 or self.attributes[phase] != self.attributes[phase - 1]
+        ]
+        self.rows = array('H')
+        self.columns = array('H')
+        self.offsets = array('L')
+        self.symbols = []
+        self._buckets = [[] for _ in range(self.period)]
+        self._rendered_tick = None
+
+    def __len__(self):
+        return len(self.symbols)
+
+    def add(self, row, column, symbol, offset):
+        star = len(self.symbols)
+        self.rows.append(row)
+        self.columns.append(column)
+        self.symbols.append(symbol)
+        self.offsets.append(offset)
+        for phase in self._change_phases:
+            self._buckets[(offset + phase) % self.period].append(star)
+
+    def changed(self, first_tick, last_tick):
+        """Звёзды, которые меняли атрибут на тиках first_tick..last_tick включительно."""
+        if last_tick - first_tick + 1 >= self.period:
+            return range(len(self.symbols))
+        if first_tick == last_tick:
+            return self._buckets[last_tick % self.period]
+        stars = set()
+        for tick in range(first_tick, last_tick + 1):
+            stars.update(self._buckets[tick % self.period])
+        return sorted(stars)
+
+    def draw(self, canvas, tick):
+        """Записать на холст звёзды, изменившиеся с прошлой отрисовки слоя."""
+        # Первая отрисовка пишет всё, что загорелось с нулевого тика: звезда могла зажечься до первого кадра
+        first_tick = 0 if self._rendered_tick is None else self._rendered_tick + 1
+        self._rendered_tick = tick
+        rows, columns, offsets, symbols = self.rows, self.columns, self.offsets, self.symbols
+        attributes, period = self.attributes, self.period
+
+        for star in self.changed(first_tick, tick):
+            age = tick - offsets[star]
+            if age < 0:
+                # Звезда ещё не зажглась
+                continue
+            try:
+                canvas.addstr(rows[star], columns[star], symbols[star], attributes[age % period])
+            except curses.error:
+                pass
+
+    async def run(self, canvas):
+        """Системная корутина звёзд: пишет изменения на тиках, кадр которых попадёт на экран.
+
+        Под нагрузкой регулятор качества поднимает quality.star_stride, и
+        мерцание обновляется только на каждом star_stride-м выводимом кадре.
+        """
+        frames = 0
+        while True:
+            if clock.rendering:
+                if frames % quality.star_stride == 0:
+                    self.draw(canvas, clock.tick)
+                frames += 1
+            await clock.sleep(1)
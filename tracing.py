@@ -0,0 +1,190 @@
+import collections
+import collections.abc
+import functools
+import json
+import os
+import threading
+import time
+
+from scheduler import clock
+
+# Метка опоздания ставится, когда таймер часов опоздал больше чем на такую долю тика
+LAG_MARKER_FRACTION = 0.5
+# Дорожка, на которой лежат тики часов: они перекрываются с шагами задач и не вкладываются в них
+CLOCK_TRACK = 0
+# Сколько последних событий держит трасса: около 180 байт на событие, при ~50 событиях
+# на тик это минут двадцать игры и меньше 100 МБ — долгая сессия не растёт без предела
+MAX_TRACE_EVENTS = 500_000
+
+
+class TracedCoroutine(collections.abc.Coroutine):
+    """Обёртка корутины: каждое её возобновление становится отрезком трассы.
+
+    Задача asyncio двигает корутину через send() и throw(); обёртка
+    засекает время вокруг каждого вызова и отдаёт отрезок трассировщику
+    под именем вида задачи. Сама корутина об обёртке не знает.
+    """
+
+    __slots__ = ('_coroutine', '_tracer', '_name')
+
+    def __init__(self, coroutine, tracer, name):
+        self._coroutine = coroutine
+        self._tracer = tracer
+        self._name = name
+
+    def send(self, value):
+        started_at = time.perf_counter()
+        try:
+            return self._coroutine.send(value)
+        finally:
+            self._tracer.span(self._name, 'task', started_at)
+
+    def throw(self, *args):
+        started_at = time.perf_counter()
+        try:
+            return self._coroutine.throw(*args)
+        finally:
+            self._tracer.span(self._name, 'task', started_at)
+
+    def close(self):
+        self._coroutine.close()
+
+    def __await__(self):
+        return self
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return self.send(None)
+
+
+class TracedBackend:
+    """Бэкенд вывода, у которого каждый вызов draw() и flush() — отрезок трассы.
+
+    Для бэкенда curses это addstr и refresh. Остальные атрибуты (name,
+    uses_window, bytes_total) читаются у настоящего бэкенда.
+    """
+
+    def __init__(self, backend, tracer):
+        self._backend = backend
+        self._tracer = tracer
+        self._draw_name = f'{backend.name}.draw'
+        self._flush_name = f'{backend.name}.flush'
+
+    def __getattr__(self, name):
+        return getattr(self._backend, name)
+
+    def border(self):
+        self._backend.border()
+
+    def draw(self, row, column, text, attr):
+        started_at = time.perf_counter()
+        self._backend.draw(row, column, text, attr)
+        self._tracer.span(self._draw_name, 'output', started_at)
+
+    def flush(self):
+        started_at = time.perf_counter()
+        self._backend.flush()
+        self._tracer.span(self._flush_name, 'output', started_at)
+
+
+class Tracer:
+    """Трассировка игры в формате Chrome trace events — открывается в Perfetto и chrome://tracing.
+
+    Пишет отрезки трёх видов: возобновления задач игры по виду задачи
+    (wrap), вызовы бэкенда вывода (TracedBackend) и отдельные функции
+    (traced). Как слушатель часов добавляет тики на своей дорожке,
+    счётчик опоздания таймера и метки тиков, опоздавших больше чем на
+    LAG_MARKER_FRACTION тика. Отрезки из потока вывода попадают на его
+    дорожку.
+
+    Когда трассировка выключена, трассировщика нет вовсе: задачи, бэкенд
+    и слушатели часов ставятся без обёрток и ничего не платят.
+    События копятся в памяти кортежами в кольцевом буфере на max_events
+    последних и превращаются в JSON в save(): трасса долгой сессии
+    начинается не с её начала, зато память не растёт.
+    """
+
+    def __init__(self, tic_timeout, max_events=MAX_TRACE_EVENTS):
+        self.tic_timeout = tic_timeout
+        self.pid = os.getpid()
+        self._origin = time.perf_counter()
+        # (фаза, имя, категория, начало, длительность, поток, аргументы)
+        self._events = collections.deque(maxlen=max_events)
+        self._threads = {}
+
+    def __len__(self):
+        return len(self._events)
+
+    def _thread(self):
+        ident = threading.get_ident()
+        if ident not in self._threads:
+            self._threads[ident] = threading.current_thread().name
+        return ident
+
+    def span(self, name, category, started_at, args=None):
+        """Отрезок от started_at до текущего момента в текущем потоке."""
+        now = time.perf_counter()
+        self._events.append(('X', name, category, started_at, now - started_at, self._thread(), args))
+
+    def wrap(self, coroutine, name=None):
+        """Корутина, возобновления которой пишутся отрезками; имя по умолчанию — её функция."""
+        return TracedCoroutine(coroutine, self, name or coroutine.__qualname__)
+
+    def traced(self, name, function, category='call'):
+        """Функция, каждый вызов которой пишется отрезком."""
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            started_at = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self.span(name, category, started_at)
+
+        return wrapper
+
+    def on_tick(self, tick):
+        """Слушатель игровых часов: отрезок тика, опоздание таймера и метка, если оно велико."""
+        now = time.perf_counter()
+        started_at = clock.tick_started_at
+        events = self._events
+        events.append((
+            'X', 'tick', 'clock', started_at, now - started_at, CLOCK_TRACK,
+            {'tick': tick, 'rendered': clock.rendering},
+        ))
+        events.append(('C', 'lag', 'clock', started_at, 0, CLOCK_TRACK, {'ms': round(clock.lag * 1000, 3)}))
+        if clock.lag > self.tic_timeout * LAG_MARKER_FRACTION:
+            events.append((
+                'i', 'late', 'clock', started_at, 0, CLOCK_TRACK,
+                {'tick': tick, 'lag_ms': round(clock.lag * 1000, 3)},
+            ))
+
+    def to_dict(self):
+        origin, pid = self._origin, self.pid
+        trace = [
+            {'ph': 'M', 'name': 'process_name', 'pid': pid, 'tid': CLOCK_TRACK, 'args': {'name': 'rocket_power'}},
+            {'ph': 'M', 'name': 'thread_name', 'pid': pid, 'tid': CLOCK_TRACK, 'args': {'name': 'clock'}},
+        ]
+        trace.extend(
+            {'ph': 'M', 'name': 'thread_name', 'pid': pid, 'tid': ident, 'args': {'name': name}}
+            for ident, name in self._threads.items()
+        )
+        for phase, name, category, started_at, duration, thread, args in self._events:
+            # Chrome ждёт микросекунды от начала трассы
+            event = {
+                'ph': phase, 'name': name, 'cat': category, 'pid': pid, 'tid': thread,
+                'ts': round((started_at - origin) * 1e6, 3),
+            }
+            if phase == 'X':
+                event['dur'] = round(duration * 1e6, 3)
+            elif phase == 'i':
+                event['s'] = 'p'
+            if args is not None:
+                event['args'] = args
+            trace.append(event)
+        return {'traceEvents': trace, 'displayTimeUnit': 'ms'}
+
+    def save(self, path):
+        with open(path, 'w', encoding='utf-8') as fh:
+            json.dump(self.to_dict(), fh, separators=(',', ':'))
@@ -0,0 +1,364 @@
+from array import array
+import collections
+
+from obstacles import overlaps
+from physics import update_speed
+
+# Правила мира: размеры поля, кадров и параметры огня — всё, что нужно шагу без холста
+Rules = collections.namedtuple(
+    'Rules',
+    'rows columns border ship_sizes garbage_sizes fire_speed fire_unlock_tick flash_ticks move_ticks frame_switch',
+)
+
+
+class Ship:
+    """Состояние корабля: позиция, скорость и кадр анимации.
+
+    Одна и та же move() двигает и корабль игры, и корабль мира в
+    предсказаниях автопилота, поэтому они не расходятся.
+    """
+
+    __slots__ = ('row', 'column', 'row_speed', 'column_speed', 'frame', 'frame_counter')
+
+    def __init__(self, row=0.0, column=0.0):
+        self.row = row
+        self.column = column
+        self.row_speed = 0.0
+        self.column_speed = 0.0
+        self.frame = 0
+        self.frame_counter = 0
+
+    def state(self):
+        return self.row, self.column, self.row_speed, self.column_speed, self.frame, self.frame_counter
+
+    def set_state(self, state):
+        self.row, self.column, self.row_speed, self.column_speed, self.frame, self.frame_counter = state
+
+    def clamp(self, rules):
+        """Вернуть корабль в поле с учётом размера текущего кадра, не трогая скорость."""
+        frame_rows, frame_columns = rules.ship_sizes[self.frame]
+        max_row = max(rules.border, rules.rows - frame_rows - rules.border)
+        max_column = max(rules.border, rules.columns - frame_columns - rules.border)
+        self.row = min(max(self.row, rules.border), max_row)
+        self.column = min(max(self.column, rules.border), max_column)
+
+    def move(self, rules, rows_direction, columns_direction):
+        """Шаг корабля на тик: скорость, упор в края поля и смена кадра анимации."""
+        self.row_speed, self.column_speed = update_speed(
+            self.row_speed, self.column_speed, rows_direction, columns_direction,
+        )
+        border = rules.border
+        frame_rows, frame_columns = rules.ship_sizes[self.frame]
+        max_row = max(border, rules.rows - frame_rows - border)
+        max_column = max(border, rules.columns - frame_columns - border)
+
+        row = self.row + self.row_speed
+        column = self.column + self.column_speed
+        if row < border:
+            row, self.row_speed = border, 0
+        elif row > max_row:
+            row, self.row_speed = max_row, 0
+        if column < border:
+            column, self.column_speed = border, 0
+        elif column > max_column:
+            column, self.column_speed = max_column, 0
+        self.row, self.column = row, column
+
+        self.frame_counter += 1
+        if self.frame_counter >= rules.frame_switch:
+            self.frame = (self.frame + 1) % len(rules.ship_sizes)
+            self.frame_counter = 0
+            self.clamp(rules)
+
+
+# Порядок систем внутри тика: по нему main.draw() запускает задачи игры, а World.step() —
+# свои шаги. Корабль сталкивается с мусором прошлого тика, снаряды — с мусором этого.
+# Внутри системы снаряды проверяются от старших к младшим, а снаряд, задевший несколько
+# кусков мусора, сбивает запущенный раньше всех.
+TICK_ORDER = ('ship', 'garbage', 'bullets')
+
+
+# Правила полёта, выстрела и попаданий: по ним ходят и системы игры в main.py, и World
+
+def flown(start, speed, steps):
+    """Координата после steps равномерных шагов от start.
+
+    Положение считается от точки запуска, а не прибавлением скорости на
+    каждом тике: так игра и World получают одно и то же число до бита.
+    """
+    return start + speed * steps
+
+
+def garbage_bottom(rules, rows):
+    """Строка, дойдя до которой мусор высотой rows уходит за нижний край поля."""
+    return max(rules.rows - rows - rules.border, rules.border)
+
+
+def fire_unlocked(rules, tick):
+    return tick >= rules.fire_unlock_tick
+
+
+def fire_origin(rules, ship_row, ship_column, ship_columns):
+    """Строка и колонка, откуда вылетает снаряд корабля шириной ship_columns в клетке (ship_row, ship_column)."""
+    border = rules.border
+    return max(ship_row - 1, border), min(max(ship_column + ship_columns // 2, border), rules.columns - border)
+
+
+def bullet_checked(rules, age):
+    """Проверяется ли снаряд возраста age тиков: в конце вспышки и на каждом своём шаге."""
+    age -= rules.flash_ticks
+    return age >= 0 and age % rules.move_ticks == 0
+
+
+def bullet_moves(rules, age):
+    """Сколько шагов снаряд возраста age тиков сделал к концу тика."""
+    age -= rules.flash_ticks
+    return age // rules.move_ticks if age > 0 else 0
+
+
+def bullet_in_field(rules, row, column):
+    border = rules.border
+    return border <= row < rules.rows - border and border <= column < rules.columns - border
+
+
+class World:
+    """Состояние игры без холста для предсказаний: корабль, мусор, снаряды и расписание.
+
+    Мусор и снаряды летят равномерно, поэтому сущность хранит не текущую
+    строку, а точку и тик запуска: положение на любом тике считает flown(),
+    а шаг мира ничего не переписывает у живых объектов. Меняются только
+    корабль, несколько чисел и набор сущностей — новые дописываются в
+    конец массивов, погибшие помечаются в alive и попадают в журнал.
+    Поэтому snapshot() — это кортеж длин и чисел, а restore() обрезает
+    массивы и оживляет сущности из хвоста журнала: оба стоят O(изменений
+    с момента снимка), а не O(размера мира).
+
+    step() играет системы в порядке TICK_ORDER, том же, в каком main.draw()
+    запускает задачи игры: корабль (столкновение с мусором на прошлых
+    позициях, выстрел), мусор (полёт, уход за нижний край, запуски по
+    расписанию), снаряды (полёт, попадания). Сами правила — Ship.move(),
+    функции выше и obstacles.overlaps() — общие с системами игры, своя у
+    мира только раскладка сущностей по массивам. Что оба пути и дальше
+    совпадают тик в тик, проверяет replay.py --parity.
+    """
+
+    def __init__(self, rules):
+        self.rules = rules
+        self.ship = Ship()
+        self.tick = 0
+        self.crashed = False
+        self.hits = 0
+        self.garbage_rows = array('d')
+        self.garbage_born = array('q')
+        self.garbage_columns = array('d')
+        self.garbage_speeds = array('d')
+        self.garbage_sprites = array('H')
+        self.garbage_alive = bytearray()
+        self.bullet_rows = array('d')
+        self.bullet_columns = array('d')
+        self.bullet_born = array('q')
+        self.bullet_alive = bytearray()
+        # Погибшие сущности по порядку: (живые флаги, номер) — для restore()
+        self._journal = []
+        self.spawns = ()
+        self._next_spawn = 0
+        # По кадру мусора: высота, ширина и строка, дойдя до которой он уходит за нижний край
+        self._garbage_frames = [(rows, columns, garbage_bottom(rules, rows)) for rows, columns in rules.garbage_sizes]
+        self._systems = [getattr(self, f'_step_{name}') for name in TICK_ORDER]
+        # Ввод тика для корабля и живой мусор тика (номер, строка, колонка, высота, ширина) для снарядов
+        self._controls = (0, 0, False)
+        self._targets = []
+
+    def reset(self, tick, ship_state, spawns=()):
+        """Очистить мир перед заполнением: тик, который шаг сыграет первым, и корабль."""
+        self.tick = tick
+        self.crashed = False
+        self.hits = 0
+        self.ship.set_state(ship_state)
+        for values in (
+            self.garbage_rows, self.garbage_born, self.garbage_columns, self.garbage_speeds,
+            self.garbage_sprites, self.garbage_alive,
+            self.bullet_rows, self.bullet_columns, self.bullet_born, self.bullet_alive,
+        ):
+            del values[:]
+        self._journal.clear()
+        self.schedule(spawns)
+
+    def schedule(self, spawns):
+        """Заменить запуски мусора впереди: расписание игры считается наперёд кусками."""
+        self.spawns = tuple(spawns)
+        self._next_spawn = 0
+
+    def add_garbage(self, row, column, speed, sprite, born):
+        """Мусор, запущенный со строки row в конце тика born."""
+        self.garbage_rows.append(row)
+        self.garbage_born.append(born)
+        self.garbage_columns.append(column)
+        self.garbage_speeds.append(speed)
+        self.garbage_sprites.append(sprite)
+        self.garbage_alive.append(1)
+
+    def add_bullet(self, row, column, born):
+        """Снаряд, выпущенный на тике born из клетки (row, column)."""
+        self.bullet_rows.append(row)
+        self.bullet_columns.append(column)
+        self.bullet_born.append(born)
+        self.bullet_alive.append(1)
+
+    def snapshot(self):
+        return (
+            self.tick, self.crashed, self.hits, self.ship.state(), self._next_spawn,
+            len(self.garbage_alive), len(self.bullet_alive), len(self._journal),
+        )
+
+    def restore(self, snapshot):
+        (
+            self.tick, self.crashed, self.hits, ship_state, self._next_spawn,
+            garbage_count, bullet_count, journal_size,
+        ) = snapshot
+        self.ship.set_state(ship_state)
+        journal = self._journal
+        while len(journal) > journal_size:
+            alive, index = journal.pop()
+            alive[index] = 1
+        for values in (
+            self.garbage_rows, self.garbage_born, self.garbage_columns, self.garbage_speeds,
+            self.garbage_sprites, self.garbage_alive,
+        ):
+            del values[garbage_count:]
+        for values in (self.bullet_rows, self.bullet_columns, self.bullet_born, self.bullet_alive):
+            del values[bullet_count:]
+
+    def state(self):
+        """Корабль и живые сущности с точками запуска — то, в чём мир может разойтись с игрой."""
+        garbage = sorted(
+            (self.garbage_born[index], self.garbage_rows[index], self.garbage_columns[index],
+             self.garbage_speeds[index], self.garbage_sprites[index])
+            for index in range(len(self.garbage_alive)) if self.garbage_alive[index]
+        )
+        bullets = sorted(
+            (self.bullet_born[index], self.bullet_rows[index], self.bullet_columns[index])
+            for index in range(len(self.bullet_alive)) if self.bullet_alive[index]
+        )
+        return self.ship.state(), garbage, bullets
+
+    def garbage_row(self, index, tick):
+        """Строка мусора в конце тика tick."""
+        return flown(self.garbage_rows[index], self.garbage_speeds[index], tick - self.garbage_born[index])
+
+    def _kill(self, alive, index):
+        alive[index] = 0
+        self._journal.append((alive, index))
+
+    def step(self, rows_direction, columns_direction, space_pressed):
+        """Сыграть тик self.tick с таким вводом и перейти к следующему; после аварии ничего не делает."""
+        if self.crashed:
+            return
+        self._controls = (rows_direction, columns_direction, space_pressed)
+        for system in self._systems:
+            system(self.tick)
+            if self.crashed:
+                break
+        self.tick += 1
+
+    def _step_ship(self, tick):
+        rules, ship = self.rules, self.ship
+        rows_direction, columns_direction, space_pressed = self._controls
+        garbage_frames = self._garbage_frames
+        garbage_alive, garbage_rows, garbage_born, garbage_speeds, garbage_columns, garbage_sprites = (
+            self.garbage_alive, self.garbage_rows, self.garbage_born, self.garbage_speeds,
+            self.garbage_columns, self.garbage_sprites,
+        )
+
+        ship.move(rules, rows_direction, columns_direction)
+        ship_row, ship_column = round(ship.row), round(ship.column)
+        ship_rows, ship_columns = rules.ship_sizes[ship.frame]
+        # Мусор этого тика ещё не сдвинулся: корабль сталкивается с ним на прошлых позициях
+        for index in range(len(garbage_alive)):
+            if not garbage_alive[index]:
+                continue
+            rows, columns, _ = garbage_frames[garbage_sprites[index]]
+            row = flown(garbage_rows[index], garbage_speeds[index], tick - 1 - garbage_born[index])
+            if overlaps(row, garbage_columns[index], rows, columns, ship_row, ship_column, ship_rows, ship_columns):
+                self.crashed = True
+                return
+
+        if space_pressed and fire_unlocked(rules, tick):
+            self.add_bullet(*fire_origin(rules, ship_row, ship_column, ship_columns), tick)
+
+    def _step_garbage(self, tick):
+        garbage_frames = self._garbage_frames
+        garbage_alive, garbage_rows, garbage_born, garbage_speeds, garbage_columns, garbage_sprites = (
+            self.garbage_alive, self.garbage_rows, self.garbage_born, self.garbage_speeds,
+            self.garbage_columns, self.garbage_sprites,
+        )
+        targets = self._targets = []
+        for index in range(len(garbage_alive)):
+            if not garbage_alive[index]:
+                continue
+            rows, columns, bottom = garbage_frames[garbage_sprites[index]]
+            row = flown(garbage_rows[index], garbage_speeds[index], tick - garbage_born[index])
+            if row >= bottom:
+                self._kill(garbage_alive, index)
+            else:
+                targets.append((index, row, garbage_columns[index], rows, columns))
+
+        spawns = self.spawns
+        while self._next_spawn < len(spawns) and spawns[self._next_spawn].tick <= tick:
+            spawn = spawns[self._next_spawn]
+            self.add_garbage(0, spawn.column, spawn.speed, spawn.sprite, tick)
+            rows, columns, _ = garbage_frames[spawn.sprite]
+            targets.append((len(garbage_alive) - 1, 0, spawn.column, rows, columns))
+            self._next_spawn += 1
+
+    def _step_bullets(self, tick):
+        rules, targets = self.rules, self._targets
+        bullet_alive, bullet_rows, bullet_columns, bullet_born = (
+            self.bullet_alive, self.bullet_rows, self.bullet_columns, self.bullet_born,
+        )
+        garbage_alive = self.garbage_alive
+        fire_speed = rules.fire_speed
+        by_column = {}
+
+        for index in range(len(bullet_alive)):
+            if not bullet_alive[index]:
+                continue
+            age = tick - bullet_born[index]
+            if not bullet_checked(rules, age):
+                continue
+            row = flown(bullet_rows[index], fire_speed, bullet_moves(rules, age))
+            column = bullet_columns[index]
+            if not bullet_in_field(rules, row, column):
+                self._kill(bullet_alive, index)
+                continue
+
+            row, column = round(row), round(column)
+            # Снаряды летят из пушки почти одной колонкой: мусор над колонкой отбирается раз на тик
+            candidates = by_column.get(column)
+            if candidates is None:
+                candidates = by_column[column] = [
+                    target for target in targets if target[2] <= column < target[2] + target[4]
+                ]
+            for target, target_row, target_column, rows, columns in candidates:
+                if overlaps(target_row, target_column, rows, columns, row, column, 1, 1) and garbage_alive[target]:
+                    self._kill(garbage_alive, target)
+                    self._kill(bullet_alive, index)
+                    self.hits += 1
+                    break
+
+    def clearance(self):
+        """Сколько строк до ближайшего мусора над кораблём в его колонках, если он есть."""
+        rules, ship = self.rules, self.ship
+        ship_row, ship_column = round(ship.row), round(ship.column)
+        _, ship_columns = rules.ship_sizes[ship.frame]
+        nearest = rules.rows
+        for index in range(len(self.garbage_alive)):
+            if not self.garbage_alive[index]:
+                continue
+            rows, columns = rules.garbage_sizes[self.garbage_sprites[index]]
+            column = self.garbage_columns[index]
+            if column < ship_column + ship_columns and ship_column < column + columns:
+                gap = ship_row - (self.garbage_row(index, self.tick - 1) + rows)
+                if 0 <= gap < nearest:
+                    nearest = gap
+        return nearest